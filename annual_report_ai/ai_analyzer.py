@@ -4,19 +4,132 @@ AI分析引擎
 综合分析年报数据，生成智能建议
 """
 
-from typing import Dict, List, Optional
+import numpy as np
+from collections import Counter
+from dataclasses import dataclass
+from itertools import chain
+from types import MappingProxyType
+from typing import Dict, List, Optional, Tuple, Union
 import logging
+import sys
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 严重程度与问题类别常量（驻留后比较和哈希可走指针快速路径）
+SEVERITY_HIGH = sys.intern('High')
+SEVERITY_MEDIUM = sys.intern('Medium')
+SEVERITY_LOW = sys.intern('Low')
+CATEGORY_DATA = sys.intern('数据验证')
+CATEGORY_TEXT = sys.intern('文字检查')
+
+# 缺省字段的只读空映射，避免在循环中反复创建空字典
+_EMPTY = MappingProxyType({})
+
+# 文字检查结果中需要汇总的问题列表
+TEXT_ISSUE_KEYS = ('grammar_issues', 'terminology_issues', 'expression_issues')
+
+# 文字问题类型分组（兼容 TextChecker 与 EnhancedTextChecker 的类型名称）
+TERMINOLOGY_TYPES = frozenset({'术语不一致', '术语问题'})
+GRAMMAR_TYPES = frozenset({'语法问题'})
+EXPRESSION_TYPES = frozenset({'表述不规范', '表述问题'})
+
+# 问题描述模板
+RECONCILIATION_DIFF_TEMPLATE = "{main_item}与{note_item}不一致，差异{difference:.2f}元"
+CROSS_YEAR_DIFF_TEMPLATE = "{item}跨年数据不一致，差异{difference:.2f}元"
+SUMMATION_DIFF_TEMPLATE = "{total_item}加总错误，差异{difference:.2f}元"
+GRAMMAR_ISSUE_TEMPLATE = "{issue_type}: {matched_text}"
+TERMINOLOGY_ISSUE_TEMPLATE = "应使用'{standard}'而非'{term}'"
+EXPRESSION_ISSUE_TEMPLATE = "{context}: {description}"
+
+
+class _FormatFields(dict):
+    """模板字段映射，缺失的金额字段取0，其余取空字符串"""
+    
+    def __missing__(self, key: str):
+        return 0 if key == 'difference' else ''
+
+
+def _trend_arrays(historical_results: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    提取历史结果的数值序列
+    
+    计数缺失或为None时按0计，其余值显式转换为整数后再写入数组。
+    
+    返回:
+        (问题总数数组, 严重程度计数矩阵)，矩阵形状为 (年份数, 3)，
+        列依次为高、中、低优先级
+    """
+    count = len(historical_results)
+    totals = np.fromiter(
+        (int(result.get('total_issues') or 0) for result in historical_results),
+        dtype=np.int64,
+        count=count
+    )
+    severity_counts = np.fromiter(
+        (
+            (int(by_severity.get(SEVERITY_HIGH) or 0),
+             int(by_severity.get(SEVERITY_MEDIUM) or 0),
+             int(by_severity.get(SEVERITY_LOW) or 0))
+            for by_severity in (
+                result.get('statistics', _EMPTY).get('by_severity', _EMPTY)
+                for result in historical_results
+            )
+        ),
+        dtype=np.dtype((np.int64, 3)),
+        count=count
+    )
+    return totals, severity_counts
+
+
+@dataclass(slots=True)
+class Issue:
+    """综合分析中的单条问题记录"""
+    category: str
+    type: str
+    severity: str
+    description: str
+    details: Dict
+    
+    def to_dict(self) -> Dict:
+        """转换为字典形式，用于分析结果输出"""
+        return {
+            'category': self.category,
+            'type': self.type,
+            'severity': self.severity,
+            'description': self.description,
+            'details': self.details
+        }
+    
+    @classmethod
+    def from_dict(cls, issue: Dict) -> 'Issue':
+        """由问题字典构造，缺失字段取空值"""
+        return cls(
+            category=issue.get('category', ''),
+            type=issue.get('type', ''),
+            severity=issue.get('severity', ''),
+            description=issue.get('description', ''),
+            details=issue.get('details', {})
+        )
+
 
 class AnnualReportAIAnalyzer:
     """年报AI分析器"""
     
     def __init__(self):
         """初始化分析器"""
-        self.priority_order = {'High': 0, 'Medium': 1, 'Low': 2}
+        self.priority_order = {SEVERITY_HIGH: 0, SEVERITY_MEDIUM: 1, SEVERITY_LOW: 2}
+        
+        # 按问题类型分派的格式化方法
+        self._data_formatters = {
+            '勾稽差异': self._format_reconciliation_diff,
+            '跨年不一致': self._format_cross_year_diff,
+            '加总错误': self._format_summation_diff
+        }
+        self._text_formatters = {
+            '语法问题': self._format_grammar_issue,
+            '术语不一致': self._format_terminology_issue,
+            '表述不规范': self._format_expression_issue
+        }
     
     def comprehensive_analysis(self, 
                               validation_results: Dict,
@@ -31,35 +144,47 @@ class AnnualReportAIAnalyzer:
         返回:
             综合分析结果
         """
+        differences = validation_results.get('differences', []) if validation_results else []
+        
+        # 没有任何问题时直接返回空结果
+        if not differences and not (
+            text_check_results
+            and any(text_check_results.get(key) for key in TEXT_ISSUE_KEYS)
+        ):
+            return self._empty_result()
+        
         logger.info("开始综合分析...")
         
-        # 收集所有问题
-        all_issues = []
+        format_data_issue = self._format_data_issue
+        format_text_issue = self._format_text_issue
         
         # 数据验证问题
-        if validation_results:
-            differences = validation_results.get('differences', [])
-            for diff in differences:
-                all_issues.append({
-                    'category': '数据验证',
-                    'type': diff.get('type', ''),
-                    'severity': diff.get('severity', 'Medium'),
-                    'description': self._format_data_issue(diff),
-                    'details': diff
-                })
+        all_issues = [
+            Issue(
+                category=CATEGORY_DATA,
+                type=diff.get('type', ''),
+                severity=diff.get('severity', SEVERITY_MEDIUM),
+                description=format_data_issue(diff),
+                details=diff
+            )
+            for diff in differences
+        ]
         
         # 文字检查问题
         if text_check_results:
-            for issue_type in ['grammar_issues', 'terminology_issues', 'expression_issues']:
-                issues = text_check_results.get(issue_type, [])
-                for issue in issues:
-                    all_issues.append({
-                        'category': '文字检查',
-                        'type': issue.get('type', ''),
-                        'severity': issue.get('severity', 'Medium'),
-                        'description': self._format_text_issue(issue),
-                        'details': issue
-                    })
+            text_issues = chain.from_iterable(
+                text_check_results.get(key, []) for key in TEXT_ISSUE_KEYS
+            )
+            all_issues.extend(
+                Issue(
+                    category=CATEGORY_TEXT,
+                    type=issue.get('type', ''),
+                    severity=issue.get('severity', SEVERITY_MEDIUM),
+                    description=format_text_issue(issue),
+                    details=issue
+                )
+                for issue in text_issues
+            )
         
         # 生成建议
         recommendations = self.generate_recommendations(all_issues)
@@ -69,182 +194,213 @@ class AnnualReportAIAnalyzer:
         
         result = {
             'total_issues': len(all_issues),
-            'issues': all_issues,
+            'issues': [issue.to_dict() for issue in all_issues],
             'recommendations': recommendations,
             'statistics': statistics,
-            'summary': self._generate_summary(all_issues, recommendations)
+            'summary': self._generate_summary(
+                len(all_issues), statistics['by_severity'], recommendations
+            )
         }
         
-        logger.info(f"分析完成: 发现{len(all_issues)}个问题，生成{len(recommendations)}条建议")
+        logger.info("分析完成: 发现%d个问题，生成%d条建议", len(all_issues), len(recommendations))
         
         return result
     
-    def generate_recommendations(self, issues: List[Dict]) -> List[Dict]:
+    def _empty_result(self) -> Dict:
+        """未发现问题时的综合分析结果"""
+        by_severity = {SEVERITY_HIGH: 0, SEVERITY_MEDIUM: 0, SEVERITY_LOW: 0}
+        return {
+            'total_issues': 0,
+            'issues': [],
+            'recommendations': [],
+            'statistics': {
+                'by_severity': by_severity,
+                'by_category': {},
+                'by_type': {}
+            },
+            'summary': self._generate_summary(0, by_severity, [])
+        }
+    
+    def generate_recommendations(self, issues: List[Union[Issue, Dict]]) -> List[Dict]:
         """
         生成智能建议
         
         参数:
-            issues: 问题列表
+            issues: 问题列表（Issue 实例或问题字典）
         
         返回:
             建议列表
         """
+        # 兼容传入问题字典的调用方
+        issues = [Issue.from_dict(issue) if isinstance(issue, dict) else issue
+                  for issue in issues]
         recommendations = []
         
-        # 按严重程度分组
-        high_priority = [i for i in issues if i.get('severity') == 'High']
-        medium_priority = [i for i in issues if i.get('severity') == 'Medium']
-        low_priority = [i for i in issues if i.get('severity') == 'Low']
+        # 单次遍历，按严重程度、类别和类型分组
+        high_priority = []
+        medium_priority = []
+        low_priority = []
+        severity_buckets = {
+            SEVERITY_HIGH: high_priority,
+            SEVERITY_MEDIUM: medium_priority,
+            SEVERITY_LOW: low_priority
+        }
+        data_issues = []
+        terminology_issues = []
+        grammar_issues = []
+        expression_issues = []
+        type_buckets = {
+            **dict.fromkeys(TERMINOLOGY_TYPES, terminology_issues),
+            **dict.fromkeys(GRAMMAR_TYPES, grammar_issues),
+            **dict.fromkeys(EXPRESSION_TYPES, expression_issues)
+        }
+        
+        get_severity_bucket = severity_buckets.get
+        get_type_bucket = type_buckets.get
+        append_data_issue = data_issues.append
+        for issue in issues:
+            bucket = get_severity_bucket(issue.severity)
+            if bucket is not None:
+                bucket.append(issue)
+            if issue.category == CATEGORY_DATA:
+                append_data_issue(issue)
+            bucket = get_type_bucket(issue.type)
+            if bucket is not None:
+                bucket.append(issue)
+        
+        generate_action_items = self._generate_action_items
         
         # 高优先级建议
         if high_priority:
             recommendations.append({
-                'priority': 'High',
+                'priority': SEVERITY_HIGH,
                 'category': '紧急处理',
                 'issue_count': len(high_priority),
                 'recommendation': f'发现{len(high_priority)}个高优先级问题，需要立即处理',
                 'expected_improvement': '避免重大错误，确保年报质量',
-                'action_items': self._generate_action_items(high_priority[:5])
+                'action_items': generate_action_items(high_priority[:5])
             })
         
         # 数据勾稽问题
-        data_issues = [i for i in issues if i.get('category') == '数据验证']
         if data_issues:
             recommendations.append({
-                'priority': 'High',
+                'priority': SEVERITY_HIGH,
                 'category': '数据勾稽',
                 'issue_count': len(data_issues),
                 'recommendation': f'发现{len(data_issues)}处数据不一致，建议核对数据来源',
                 'expected_improvement': '提高数据准确性，避免监管问题',
-                'action_items': self._generate_action_items(data_issues[:3])
+                'action_items': generate_action_items(data_issues[:3])
             })
         
         # 术语一致性问题
-        terminology_issues = [i for i in issues if '术语' in i.get('type', '')]
         if terminology_issues:
             recommendations.append({
-                'priority': 'Medium',
+                'priority': SEVERITY_MEDIUM,
                 'category': '术语统一',
                 'issue_count': len(terminology_issues),
                 'recommendation': f'发现{len(terminology_issues)}处术语不一致，建议统一使用标准术语',
                 'expected_improvement': '提升专业性和规范性',
-                'action_items': self._generate_action_items(terminology_issues[:3])
+                'action_items': generate_action_items(terminology_issues[:3])
             })
         
         # 语法问题
-        grammar_issues = [i for i in issues if '语法' in i.get('type', '')]
         if grammar_issues:
             recommendations.append({
-                'priority': 'Medium',
+                'priority': SEVERITY_MEDIUM,
                 'category': '语法优化',
                 'issue_count': len(grammar_issues),
                 'recommendation': f'发现{len(grammar_issues)}处语法问题，建议逐一修正',
                 'expected_improvement': '提高文字质量和可读性',
-                'action_items': self._generate_action_items(grammar_issues[:3])
+                'action_items': generate_action_items(grammar_issues[:3])
             })
         
         # 表述规范问题
-        expression_issues = [i for i in issues if '表述' in i.get('type', '')]
         if expression_issues:
             recommendations.append({
-                'priority': 'Low',
+                'priority': SEVERITY_LOW,
                 'category': '表述规范',
                 'issue_count': len(expression_issues),
                 'recommendation': f'发现{len(expression_issues)}处表述不规范，建议按标准格式修改',
                 'expected_improvement': '符合行业规范，提升专业形象',
-                'action_items': self._generate_action_items(expression_issues[:3])
+                'action_items': generate_action_items(expression_issues[:3])
             })
         
         # 按优先级排序
-        recommendations.sort(key=lambda x: self.priority_order.get(x['priority'], 999))
+        priority_order = self.priority_order
+        recommendations.sort(key=lambda x: priority_order.get(x['priority'], 999))
         
         return recommendations
     
     def _format_data_issue(self, diff: Dict) -> str:
         """格式化数据问题描述"""
-        diff_type = diff.get('type', '')
-        
-        if diff_type == '勾稽差异':
-            main_item = diff.get('main_item', '')
-            note_item = diff.get('note_item', '')
-            difference = diff.get('difference', 0)
-            return f"{main_item}与{note_item}不一致，差异{difference:.2f}元"
-        
-        elif diff_type == '跨年不一致':
-            item = diff.get('item', '')
-            difference = diff.get('difference', 0)
-            return f"{item}跨年数据不一致，差异{difference:.2f}元"
-        
-        elif diff_type == '加总错误':
-            total_item = diff.get('total_item', '')
-            difference = diff.get('difference', 0)
-            return f"{total_item}加总错误，差异{difference:.2f}元"
-        
-        return str(diff)
+        formatter = self._data_formatters.get(diff.get('type', ''))
+        if formatter is None:
+            return str(diff)
+        return formatter(diff)
+    
+    def _format_reconciliation_diff(self, diff: Dict) -> str:
+        """格式化勾稽差异"""
+        return RECONCILIATION_DIFF_TEMPLATE.format_map(_FormatFields(diff))
+    
+    def _format_cross_year_diff(self, diff: Dict) -> str:
+        """格式化跨年不一致"""
+        return CROSS_YEAR_DIFF_TEMPLATE.format_map(_FormatFields(diff))
+    
+    def _format_summation_diff(self, diff: Dict) -> str:
+        """格式化加总错误"""
+        return SUMMATION_DIFF_TEMPLATE.format_map(_FormatFields(diff))
     
     def _format_text_issue(self, issue: Dict) -> str:
         """格式化文字问题描述"""
-        issue_type = issue.get('type', '')
-        
-        if issue_type == '语法问题':
-            return f"{issue.get('issue_type', '')}: {issue.get('matched_text', '')}"
-        
-        elif issue_type == '术语不一致':
-            term = issue.get('term', '')
-            standard = issue.get('standard', '')
-            return f"应使用'{standard}'而非'{term}'"
-        
-        elif issue_type == '表述不规范':
-            context = issue.get('context', '')
-            return f"{context}: {issue.get('description', '')}"
-        
-        return str(issue)
+        formatter = self._text_formatters.get(issue.get('type', ''))
+        if formatter is None:
+            return str(issue)
+        return formatter(issue)
+    
+    def _format_grammar_issue(self, issue: Dict) -> str:
+        """格式化语法问题"""
+        return GRAMMAR_ISSUE_TEMPLATE.format_map(_FormatFields(issue))
+    
+    def _format_terminology_issue(self, issue: Dict) -> str:
+        """格式化术语不一致"""
+        return TERMINOLOGY_ISSUE_TEMPLATE.format_map(_FormatFields(issue))
     
-    def _generate_action_items(self, issues: List[Dict]) -> List[str]:
+    def _format_expression_issue(self, issue: Dict) -> str:
+        """格式化表述不规范"""
+        return EXPRESSION_ISSUE_TEMPLATE.format_map(_FormatFields(issue))
+    
+    def _generate_action_items(self, issues: List[Issue]) -> List[str]:
         """生成行动项"""
-        action_items = []
+        return [issue.description for issue in issues if issue.description]
+    
+    def _calculate_statistics(self, issues: List[Issue]) -> Dict:
+        """计算统计信息"""
+        by_severity = Counter()
+        by_category = Counter()
+        by_type = Counter()
         
+        # 单次遍历同时按严重程度、类别和类型计数
         for issue in issues:
-            description = issue.get('description', '')
-            if description:
-                action_items.append(description)
+            by_severity[issue.severity] += 1
+            by_category[issue.category] += 1
+            by_type[issue.type] += 1
         
-        return action_items
-    
-    def _calculate_statistics(self, issues: List[Dict]) -> Dict:
-        """计算统计信息"""
-        stats = {
+        return {
             'by_severity': {
-                'High': len([i for i in issues if i.get('severity') == 'High']),
-                'Medium': len([i for i in issues if i.get('severity') == 'Medium']),
-                'Low': len([i for i in issues if i.get('severity') == 'Low'])
+                SEVERITY_HIGH: by_severity[SEVERITY_HIGH],
+                SEVERITY_MEDIUM: by_severity[SEVERITY_MEDIUM],
+                SEVERITY_LOW: by_severity[SEVERITY_LOW]
             },
-            'by_category': {},
-            'by_type': {}
+            'by_category': dict(by_category),
+            'by_type': dict(by_type)
         }
-        
-        # 按类别统计
-        for issue in issues:
-            category = issue.get('category', 'Unknown')
-            if category not in stats['by_category']:
-                stats['by_category'][category] = 0
-            stats['by_category'][category] += 1
-            
-            # 按类型统计
-            issue_type = issue.get('type', 'Unknown')
-            if issue_type not in stats['by_type']:
-                stats['by_type'][issue_type] = 0
-            stats['by_type'][issue_type] += 1
-        
-        return stats
     
-    def _generate_summary(self, issues: List[Dict], 
+    def _generate_summary(self, total: int, by_severity: Dict[str, int],
                          recommendations: List[Dict]) -> str:
         """生成摘要"""
-        total = len(issues)
-        high = len([i for i in issues if i.get('severity') == 'High'])
-        medium = len([i for i in issues if i.get('severity') == 'Medium'])
-        low = len([i for i in issues if i.get('severity') == 'Low'])
+        high = by_severity.get(SEVERITY_HIGH, 0)
+        medium = by_severity.get(SEVERITY_MEDIUM, 0)
+        low = by_severity.get(SEVERITY_LOW, 0)
         
         summary = f"年报核对发现{total}个问题，其中高优先级{high}个、中优先级{medium}个、低优先级{low}个。"
         
@@ -269,31 +425,21 @@ class AnnualReportAIAnalyzer:
         if not historical_results:
             return {}
         
+        years = [result.get('year', '') for result in historical_results]
+        totals, severity_counts = _trend_arrays(historical_results)
+        
         trends = {
-            'issue_count_trend': [],
-            'severity_trend': [],
+            'issue_count_trend': [
+                {'year': year, 'count': total}
+                for year, total in zip(years, totals.tolist())
+            ],
+            'severity_trend': [
+                {'year': year, 'high': high, 'medium': medium, 'low': low}
+                for year, (high, medium, low) in zip(years, severity_counts.tolist())
+            ],
             'category_trend': {}
         }
         
-        for result in historical_results:
-            year = result.get('year', '')
-            total_issues = result.get('total_issues', 0)
-            
-            trends['issue_count_trend'].append({
-                'year': year,
-                'count': total_issues
-            })
-            
-            # 严重程度趋势
-            stats = result.get('statistics', {})
-            by_severity = stats.get('by_severity', {})
-            trends['severity_trend'].append({
-                'year': year,
-                'high': by_severity.get('High', 0),
-                'medium': by_severity.get('Medium', 0),
-                'low': by_severity.get('Low', 0)
-            })
-        
         return trends
     
     def compare_reports(self, report1: Dict, report2: Dict) -> Dict:
@@ -333,6 +479,7 @@ class AnnualReportAIAnalyzer:
 
 def main():
     """测试函数"""
+    logging.basicConfig(level=logging.INFO)
     analyzer = AnnualReportAIAnalyzer()
     
     # 模拟验证结果
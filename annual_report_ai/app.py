@@ -6,11 +6,17 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import sys
 import os
+import io
+import hashlib
+import logging
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
 
 # 添加当前目录到路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -20,9 +26,29 @@ from annual_report_ai.data_validator import DataValidator, ReconciliationRules
 from annual_report_ai.text_checker import TextChecker, TextComparator
 from annual_report_ai.ai_analyzer import AnnualReportAIAnalyzer
 
+logger = logging.getLogger(__name__)
 
-# 自定义CSS
-st.markdown("""
+
+# 批量解析PDF的最大线程数
+MAX_PARSE_WORKERS = 4
+
+# 年报解析结果与正文缓存的最大条目数（各会话共享）
+REPORT_CACHE_MAX_ENTRIES = 32
+
+# 年报解析结果与正文缓存的过期时间（秒）
+REPORT_CACHE_TTL = 3600
+
+# 跨年度对比表的数值显示格式
+COMPARISON_FORMATS = {
+    '当前年报上年数据': '{:,.2f}',
+    '上年年报数据': '{:,.2f}',
+    '差异': '{:,.2f}',
+    '差异率': '{:.2f}%'
+}
+
+
+# 自定义CSS（模块加载时构建一次）
+CUSTOM_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -59,7 +85,12 @@ st.markdown("""
         margin: 1rem 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+
+def _inject_css():
+    """注入自定义CSS（重跑时未输出的元素会被清除，故每次运行都需注入）"""
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 
 @st.cache_resource
@@ -72,9 +103,90 @@ def initialize_system():
     return parser, validator, checker, analyzer
 
 
+@st.cache_data(show_spinner=False, max_entries=REPORT_CACHE_MAX_ENTRIES, ttl=REPORT_CACHE_TTL)
+def _cached_report_text(text_hash: str, _text_content: Optional[str] = None) -> str:
+    """
+    年报正文缓存（按正文哈希，不放入session_state）
+    
+    写入时传入正文；仅按哈希查询且未命中时抛出 KeyError，避免把空结果写入缓存。
+    """
+    if _text_content is None:
+        raise KeyError(text_hash)
+    return _text_content
+
+
+@st.cache_data(show_spinner=False, max_entries=REPORT_CACHE_MAX_ENTRIES, ttl=REPORT_CACHE_TTL)
+def _parse_pdf_cached(_parser, _file_bytes: bytes, digest: str, file_name: str) -> dict:
+    """
+    解析上传的PDF年报（按文件内容哈希缓存）
+    
+    Streamlit每次交互都会重新执行脚本，缓存后同一文件只解析一次。
+    直接在内存中解析，无需写入临时文件。文件内容以 digest 作为缓存键，
+    避免每次调用都对整个文件重新计算哈希；文件名用于提取基金名称和年份，也计入缓存键。
+    正文单独存入正文缓存，返回的年报数据不含正文，以 text_hash 引用。
+    """
+    result = _parser.parse_pdf_stream(io.BytesIO(_file_bytes), file_name)
+    text_content = result.pop('text_content', '') or ''
+    text_hash = hashlib.sha256(text_content.encode('utf-8')).hexdigest()
+    _cached_report_text(text_hash, text_content)
+    result['text_hash'] = text_hash
+    return result
+
+
+@st.cache_resource
+def _validation_executor() -> ThreadPoolExecutor:
+    """后台验证线程池（各会话共享）"""
+    return ThreadPoolExecutor(max_workers=MAX_PARSE_WORKERS)
+
+
+def _submit_validations(validator, digest: str, report: dict):
+    """年报解析完成后在后台预先执行主表附注勾稽和加总验证"""
+    executor = _validation_executor()
+    st.session_state.setdefault('validation_futures', {})[digest] = {
+        'smart_reconciliation': executor.submit(validator.smart_reconciliation, report),
+        'auto_validate_summation': executor.submit(validator.auto_validate_summation, report)
+    }
+
+
+def _get_validation_result(validator, digest: str, report: dict, method: str) -> list:
+    """
+    获取单份年报的验证结果
+    
+    优先使用上传时提交的后台任务（未完成时等待），没有则当场计算。
+    """
+    future = st.session_state.get('validation_futures', {}).get(digest, {}).get(method)
+    if future is not None:
+        return future.result()
+    return getattr(validator, method)(report)
+
+
+def _report_names() -> tuple:
+    """已上传年报的键（仅在上传内容变化时重建）"""
+    names = st.session_state.get('report_names_tuple')
+    if names is None or len(names) != len(st.session_state.uploaded_reports):
+        names = tuple(st.session_state.uploaded_reports)
+        st.session_state.report_names_tuple = names
+    return names
+
+
+def _report_label(reports: dict):
+    """年报选择框的显示名称（年报以文件内容哈希为键）"""
+    return lambda key: reports[key]['file_name']
+
+
+def get_report_text(report: dict) -> str:
+    """获取年报正文（缓存已过期时返回空字符串）"""
+    try:
+        return _cached_report_text(report.get('text_hash'))
+    except KeyError:
+        return ''
+
+
 def main():
     """主函数"""
     
+    _inject_css()
+    
     # 标题
     st.markdown('<div class="main-header">📄 年报核对AI助手</div>', unsafe_allow_html=True)
     st.markdown("---")
@@ -103,7 +215,7 @@ def main():
     if page == "🏠 首页概览":
         show_home_page()
     elif page == "📤 文档上传":
-        show_upload_page(parser)
+        show_upload_page(parser, validator)
     elif page == "📊 数据勾稽":
         show_validation_page(validator)
     elif page == "📝 文字检查":
@@ -116,6 +228,7 @@ def main():
         show_analysis_page(analyzer)
 
 
+@st.fragment
 def show_home_page():
     """显示首页"""
     
@@ -189,7 +302,8 @@ def show_home_page():
         """, unsafe_allow_html=True)
 
 
-def show_upload_page(parser):
+@st.fragment
+def show_upload_page(parser, validator):
     """显示文档上传页面"""
     
     st.markdown("## 📤 文档上传与解析")
@@ -211,44 +325,113 @@ def show_upload_page(parser):
         if 'uploaded_reports' not in st.session_state:
             st.session_state.uploaded_reports = {}
         
-        for uploaded_file in uploaded_files:
-            # 保存到临时目录
-            temp_path = f"temp_{uploaded_file.name}"
-            with open(temp_path, 'wb') as f:
-                f.write(uploaded_file.getbuffer())
-            
-            # 解析文件
-            with st.spinner(f"正在解析 {uploaded_file.name}..."):
-                try:
-                    result = parser.parse_pdf(temp_path)
-                    st.session_state.uploaded_reports[uploaded_file.name] = result
-                    
-                    # 显示解析结果
-                    with st.expander(f"📄 {uploaded_file.name}"):
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.metric("基金名称", result.get('fund_name', 'N/A'))
-                        with col2:
-                            st.metric("年份", result.get('year', 'N/A'))
-                        with col3:
-                            st.metric("提取表格数", len(result.get('tables', {})))
-                        
-                        st.markdown("**表格列表**:")
-                        for table_name in result.get('tables', {}).keys():
-                            st.text(f"- {table_name}")
-                
-                except Exception as e:
-                    st.error(f"解析失败: {str(e)}")
+        reports = st.session_state.uploaded_reports
+        
+        # 按文件内容哈希去重，已解析过的文件不再重复解析
+        uploads = [
+            (hashlib.sha256(uploaded_file.getbuffer()).hexdigest(), uploaded_file)
+            for uploaded_file in uploaded_files
+        ]
+        pending = {
+            digest: uploaded_file for digest, uploaded_file in uploads
+            if digest not in reports
+        }
+        
+        # 并发解析新文件，结果仍按上传顺序展示
+        with st.spinner(f"正在解析 {len(pending)} 个文件..."):
+            with ThreadPoolExecutor(max_workers=min(MAX_PARSE_WORKERS, len(pending)) or 1) as executor:
+                futures = {
+                    digest: executor.submit(
+                        _parse_pdf_cached, parser, uploaded_file.getvalue(), digest, uploaded_file.name
+                    )
+                    for digest, uploaded_file in pending.items()
+                }
                 
-                finally:
-                    # 清理临时文件
-                    if os.path.exists(temp_path):
-                        os.remove(temp_path)
+                for digest, uploaded_file in uploads:
+                    file_name = uploaded_file.name
+                    try:
+                        if digest in futures:
+                            reports[digest] = futures[digest].result()
+                            _submit_validations(validator, digest, reports[digest])
+                        result = reports[digest]
+                        
+                        # 显示解析结果
+                        with st.expander(f"📄 {file_name}"):
+                            col1, col2, col3 = st.columns(3)
+                            with col1:
+                                st.metric("基金名称", result.get('fund_name', 'N/A'))
+                            with col2:
+                                st.metric("年份", result.get('year', 'N/A'))
+                            with col3:
+                                st.metric("提取表格数", len(result.get('tables', {})))
+                            
+                            st.markdown("**表格列表**:")
+                            for table_name in result.get('tables', {}).keys():
+                                st.text(f"- {table_name}")
+                    
+                    except Exception as e:
+                        st.error(f"解析失败 {file_name}: {str(e)}")
         
         st.markdown("---")
         st.success("✓ 所有文件解析完成！可以进入其他模块进行分析。")
 
 
+@st.cache_data(show_spinner=False)
+def _run_cross_year(_validator, _report1: dict, _report2: dict, digest1: str, digest2: str,
+                    tolerance: float):
+    """
+    执行跨年度对比（按两份年报的文件内容哈希和容忍度缓存，无需再哈希年报数据）
+    
+    返回:
+        (完整对比数据DataFrame, 差异列表)
+    """
+    # 每个项目只提取一次，差异列表和对比表共用同一组数值
+    items = ReconciliationRules.CROSS_YEAR_ITEMS
+    current_values, previous_values = _validator.extract_cross_year_values(
+        _report1, _report2, items
+    )
+    differences = _validator.compare_cross_year_values(
+        items, current_values, previous_values
+    )
+    
+    # 收集所有对比数据（包括匹配和不匹配的），缺失数据直接跳过
+    found = ~(np.isnan(current_values) | np.isnan(previous_values))
+    
+    # 数值列保持为浮点数，差异、差异率和状态按列向量化计算
+    comparison_df = pd.DataFrame({
+        '项目': np.asarray(items, dtype=object)[found],
+        '当前年报上年数据': current_values[found],
+        '上年年报数据': previous_values[found]
+    })
+    previous = comparison_df['上年年报数据'].to_numpy()
+    diff = np.abs(comparison_df['当前年报上年数据'].to_numpy() - previous)
+    comparison_df['差异'] = diff
+    comparison_df['差异率'] = np.divide(
+        diff, previous, out=np.zeros_like(diff), where=previous != 0
+    ) * 100
+    comparison_df['状态'] = np.where(diff <= tolerance, '✓ 匹配', '❌ 不匹配')
+    
+    return comparison_df, differences
+
+
+@st.cache_data(show_spinner=False)
+def _to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """导出CSV（带BOM，便于Excel识别中文）"""
+    return df.to_csv(index=False).encode('utf-8-sig')
+
+
+def highlight_status(df: pd.DataFrame) -> pd.DataFrame:
+    """按状态列为整行着色（一次性生成整张表的样式）"""
+    matched = df['状态'].str.contains('✓', regex=False).to_numpy()[:, None]
+    styles = np.where(matched, 'background-color: #d4edda', 'background-color: #f8d7da')
+    return pd.DataFrame(
+        np.broadcast_to(styles, df.shape),
+        index=df.index,
+        columns=df.columns
+    )
+
+
+@st.fragment
 def show_validation_page(validator):
     """显示数据验证页面"""
     
@@ -276,51 +459,30 @@ def show_validation_page(validator):
             return
         
         # 选择两份年报
-        report_names = list(reports.keys())
+        report_names = _report_names()
         col1, col2 = st.columns(2)
         
         with col1:
-            report1_name = st.selectbox("当前年报", report_names)
+            report1_name = st.selectbox("当前年报", report_names, format_func=_report_label(reports))
         with col2:
-            report2_name = st.selectbox("对比年报", [r for r in report_names if r != report1_name])
+            report2_name = st.selectbox("对比年报", [r for r in report_names if r != report1_name],
+                                        format_func=_report_label(reports))
         
         if st.button("开始对比"):
             with st.spinner("正在进行跨年度对比..."):
-                report1 = reports[report1_name]
-                report2 = reports[report2_name]
-                
                 # 执行跨年对比
-                differences = validator.validate_cross_year(
-                    report1, report2,
-                    ReconciliationRules.CROSS_YEAR_ITEMS
+                comparison_df, differences = _run_cross_year(
+                    validator,
+                    reports[report1_name],
+                    reports[report2_name],
+                    report1_name,
+                    report2_name,
+                    validator.tolerance
                 )
                 
-                # 收集所有对比数据（包括匹配和不匹配的）
-                all_comparison_data = []
-                for item in ReconciliationRules.CROSS_YEAR_ITEMS:
-                    try:
-                        # 提取数据
-                        current_last_year = validator._extract_last_year_value(report1, item)
-                        previous_year = validator._extract_current_year_value(report2, item)
-                        
-                        if current_last_year is not None and previous_year is not None:
-                            diff = abs(current_last_year - previous_year)
-                            is_match = diff <= validator.tolerance
-                            
-                            all_comparison_data.append({
-                                '项目': item,
-                                '当前年报上年数据': f"{current_last_year:,.2f}",
-                                '上年年报数据': f"{previous_year:,.2f}",
-                                '差异': f"{diff:,.2f}",
-                                '差异率': f"{(diff / previous_year * 100) if previous_year != 0 else 0:.2f}%",
-                                '状态': '✓ 匹配' if is_match else '❌ 不匹配'
-                            })
-                    except Exception as e:
-                        logger.error(f"处理项目 {item} 时出错: {str(e)}")
-                
                 # 显示统计信息
-                matched_count = len([d for d in all_comparison_data if '✓' in d['状态']])
-                total_count = len(all_comparison_data)
+                matched_count = int((comparison_df['差异'] <= validator.tolerance).sum())
+                total_count = len(comparison_df)
                 
                 col1, col2, col3 = st.columns(3)
                 with col1:
@@ -333,32 +495,21 @@ def show_validation_page(validator):
                 st.markdown("---")
                 
                 # 显示完整对比表格
-                if all_comparison_data:
+                if not comparison_df.empty:
                     st.markdown("### 📊 完整对比数据")
                     
-                    # 创建DataFrame
-                    comparison_df = pd.DataFrame(all_comparison_data)
-                    
-                    # 使用颜色标记状态
-                    def highlight_status(row):
-                        if '✓' in row['状态']:
-                            return ['background-color: #d4edda'] * len(row)
-                        else:
-                            return ['background-color: #f8d7da'] * len(row)
-                    
-                    # 显示表格
+                    # 显示表格（使用颜色标记状态）
                     st.dataframe(
-                        comparison_df.style.apply(highlight_status, axis=1),
+                        comparison_df.style.format(COMPARISON_FORMATS).apply(highlight_status, axis=None),
                         use_container_width=True,
                         height=400
                     )
                     
                     # 提供下载选项
-                    csv = comparison_df.to_csv(index=False, encoding='utf-8-sig')
                     st.download_button(
                         label="📥 下载对比数据（CSV）",
-                        data=csv,
-                        file_name=f"跨年度对比_{report1_name}_vs_{report2_name}.csv",
+                        data=_to_csv_bytes(comparison_df),
+                        file_name=f"跨年度对比_{reports[report1_name]['file_name']}_vs_{reports[report2_name]['file_name']}.csv",
                         mime="text/csv"
                     )
                 
@@ -386,14 +537,14 @@ def show_validation_page(validator):
         st.markdown("### 主表与附注勾稽")
         
         # 选择年报
-        report_name = st.selectbox("选择年报", list(reports.keys()))
+        report_name = st.selectbox("选择年报", _report_names(), format_func=_report_label(reports))
         
         if st.button("开始勾稽"):
             with st.spinner("正在进行主表与附注勾稽..."):
                 report = reports[report_name]
                 
-                # 执行智能勾稽
-                differences = validator.smart_reconciliation(report)
+                # 执行智能勾稽（上传时已在后台开始计算）
+                differences = _get_validation_result(validator, report_name, report, 'smart_reconciliation')
                 
                 # 显示结果
                 if differences:
@@ -424,14 +575,14 @@ def show_validation_page(validator):
         st.markdown("### 加总关系验证")
         
         # 选择年报
-        report_name = st.selectbox("选择年报", list(reports.keys()))
+        report_name = st.selectbox("选择年报", _report_names(), format_func=_report_label(reports))
         
         if st.button("开始验证"):
             with st.spinner("正在验证加总关系..."):
                 report = reports[report_name]
                 
-                # 执行自动加总验证
-                differences = validator.auto_validate_summation(report)
+                # 执行自动加总验证（上传时已在后台开始计算）
+                differences = _get_validation_result(validator, report_name, report, 'auto_validate_summation')
                 
                 # 显示结果
                 if differences:
@@ -462,6 +613,13 @@ def show_validation_page(validator):
                     st.success("✓ 所有加总关系正确！")
 
 
+@st.cache_data(show_spinner=False)
+def _cached_text_check(_checker, text_content: str) -> dict:
+    """文字检查（按文本内容缓存，避免重复分词和正则扫描）"""
+    return _checker.check_text(text_content)
+
+
+@st.fragment
 def show_text_check_page(checker):
     """显示文字检查页面"""
     
@@ -474,19 +632,19 @@ def show_text_check_page(checker):
     reports = st.session_state.uploaded_reports
     
     # 选择年报
-    report_name = st.selectbox("选择年报", list(reports.keys()))
+    report_name = st.selectbox("选择年报", _report_names(), format_func=_report_label(reports))
     
     if st.button("开始检查"):
         with st.spinner("正在检查文字内容..."):
             report = reports[report_name]
-            text_content = report.get('text_content', '')
+            text_content = get_report_text(report)
             
             if not text_content:
                 st.error("未能提取文本内容")
                 return
             
             # 执行检查
-            results = checker.check_text(text_content)
+            results = _cached_text_check(checker, text_content)
             
             # 显示统计
             col1, col2, col3, col4 = st.columns(4)
@@ -532,6 +690,15 @@ def show_text_check_page(checker):
                     st.success("✓ 表述规范")
 
 
+@st.cache_data(show_spinner=False)
+def _cached_compare_sections(text1: str, text2: str, section_keywords: tuple) -> list:
+    """章节文本对比（按两份年报文本和章节关键词缓存）"""
+    return TextComparator.compare_sections(
+        {'text_content': text1}, {'text_content': text2}, list(section_keywords)
+    )
+
+
+@st.fragment
 def show_text_comparison_page():
     """显示文本对比页面"""
     
@@ -550,13 +717,14 @@ def show_text_comparison_page():
     st.info("对比两份年报的文本内容，识别关键变化")
     
     # 选择两份年报
-    report_names = list(reports.keys())
+    report_names = _report_names()
     col1, col2 = st.columns(2)
     
     with col1:
-        report1_name = st.selectbox("当前年报", report_names)
+        report1_name = st.selectbox("当前年报", report_names, format_func=_report_label(reports))
     with col2:
-        report2_name = st.selectbox("对比年报", [r for r in report_names if r != report1_name])
+        report2_name = st.selectbox("对比年报", [r for r in report_names if r != report1_name],
+                                    format_func=_report_label(reports))
     
     # 选择对比章节
     section_keywords = st.multiselect(
@@ -570,9 +738,11 @@ def show_text_comparison_page():
             report1 = reports[report1_name]
             report2 = reports[report2_name]
             
-            # 执行文本对比
-            comparisons = TextComparator.compare_sections(
-                report1, report2, section_keywords
+            # 执行文本对比（按文本内容和章节缓存）
+            comparisons = _cached_compare_sections(
+                get_report_text(report1),
+                get_report_text(report2),
+                tuple(section_keywords)
             )
             
             if not comparisons:
@@ -591,7 +761,10 @@ def show_text_comparison_page():
             with col2:
                 st.metric("平均相似度", f"{avg_similarity:.1%}")
             with col3:
-                major_changes = sum(1 for c in comparisons if c['change_analysis']['is_major_change'])
+                major_changes = int(np.fromiter(
+                    (c['change_analysis']['is_major_change'] for c in comparisons),
+                    dtype=bool, count=len(comparisons)
+                ).sum())
                 st.metric("重大变化", major_changes)
             
             st.markdown("---")
@@ -660,38 +833,21 @@ def show_text_comparison_page():
                         st.markdown(f"**对比年报**: {comparison['text2_length']}字符, {comparison['text2_words']}词")
 
 
-def show_trend_analysis_page(validator):
-    """显示历史趋势分析页面"""
-    
-    st.markdown("## 📈 历史趋势分析")
-    
-    if 'uploaded_reports' not in st.session_state or not st.session_state.uploaded_reports:
-        st.warning("请先上传年报文件")
-        return
-    
-    reports = st.session_state.uploaded_reports
-    
-    if len(reports) < 2:
-        st.warning("需要至少2份年报才能进行趋势分析")
-        return
-    
-    st.info("分析多年度数据的变化趋势和问题分布")
-    
-    # 模拟历史数据（实际应该从验证结果中获取）
-    # 这里创建示例数据用于演示
-    years = sorted([2020, 2021, 2022, 2023, 2024])
-    
-    # 问题数量趋势
-    st.markdown("### 📊 问题数量趋势")
-    
+# 趋势分析示例数据的年份
+TREND_YEARS = [2020, 2021, 2022, 2023, 2024]
+
+
+@st.cache_resource(show_spinner=False)
+def _trend_problem_fig():
+    """问题数量趋势图（示例数据）"""
     problem_data = pd.DataFrame({
-        '年份': years,
+        '年份': TREND_YEARS,
         '数据勾稽问题': [15, 12, 8, 5, 3],
         '文字检查问题': [25, 20, 15, 10, 8],
         '加总验证问题': [10, 8, 6, 4, 2]
     })
     
-    fig1 = px.line(
+    fig = px.line(
         problem_data,
         x='年份',
         y=['数据勾稽问题', '文字检查问题', '加总验证问题'],
@@ -699,64 +855,100 @@ def show_trend_analysis_page(validator):
         labels={'value': '问题数量', 'variable': '问题类型'},
         markers=True
     )
-    fig1.update_layout(hovermode='x unified')
-    st.plotly_chart(fig1, use_container_width=True)
-    
-    # 严重程度分布
-    st.markdown("### 🎯 问题严重程度分布")
-    
+    fig.update_layout(hovermode='x unified')
+    return fig
+
+
+@st.cache_resource(show_spinner=False)
+def _trend_severity_fig():
+    """问题严重程度分布图（示例数据）"""
     severity_data = pd.DataFrame({
-        '年份': years,
+        '年份': TREND_YEARS,
         '高': [8, 6, 4, 2, 1],
         '中': [20, 16, 12, 8, 6],
         '低': [22, 18, 13, 9, 6]
     })
     
-    fig2 = go.Figure()
-    fig2.add_trace(go.Bar(name='高', x=severity_data['年份'], y=severity_data['高'], marker_color='#ff4444'))
-    fig2.add_trace(go.Bar(name='中', x=severity_data['年份'], y=severity_data['中'], marker_color='#ffaa00'))
-    fig2.add_trace(go.Bar(name='低', x=severity_data['年份'], y=severity_data['低'], marker_color='#44ff44'))
+    fig = go.Figure()
+    fig.add_trace(go.Bar(name='高', x=severity_data['年份'], y=severity_data['高'], marker_color='#ff4444'))
+    fig.add_trace(go.Bar(name='中', x=severity_data['年份'], y=severity_data['中'], marker_color='#ffaa00'))
+    fig.add_trace(go.Bar(name='低', x=severity_data['年份'], y=severity_data['低'], marker_color='#44ff44'))
     
-    fig2.update_layout(
+    fig.update_layout(
         title='问题严重程度分布趋势',
         xaxis_title='年份',
         yaxis_title='问题数量',
         barmode='stack',
         hovermode='x unified'
     )
-    st.plotly_chart(fig2, use_container_width=True)
-    
-    # 问题类型分布
-    st.markdown("### 🔍 问题类型分布变化")
-    
+    return fig
+
+
+@st.cache_resource(show_spinner=False)
+def _trend_type_fig():
+    """问题类型年度对比图（示例数据）"""
     type_data = pd.DataFrame({
         '问题类型': ['数据勾稽', '文字检查', '加总验证', '主表附注勾稽', '跨年对比'],
         '2023年': [5, 10, 4, 3, 2],
         '2024年': [3, 8, 2, 1, 1]
     })
     
-    fig3 = go.Figure()
-    fig3.add_trace(go.Bar(
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
         name='2023年',
         x=type_data['问题类型'],
         y=type_data['2023年'],
         marker_color='#1f77b4'
     ))
-    fig3.add_trace(go.Bar(
+    fig.add_trace(go.Bar(
         name='2024年',
         x=type_data['问题类型'],
         y=type_data['2024年'],
         marker_color='#ff7f0e'
     ))
     
-    fig3.update_layout(
+    fig.update_layout(
         title='问题类型年度对比',
         xaxis_title='问题类型',
         yaxis_title='问题数量',
         barmode='group',
         hovermode='x unified'
     )
-    st.plotly_chart(fig3, use_container_width=True)
+    return fig
+
+
+@st.fragment
+def show_trend_analysis_page(validator):
+    """显示历史趋势分析页面"""
+    
+    st.markdown("## 📈 历史趋势分析")
+    
+    if 'uploaded_reports' not in st.session_state or not st.session_state.uploaded_reports:
+        st.warning("请先上传年报文件")
+        return
+    
+    reports = st.session_state.uploaded_reports
+    
+    if len(reports) < 2:
+        st.warning("需要至少2份年报才能进行趋势分析")
+        return
+    
+    st.info("分析多年度数据的变化趋势和问题分布")
+    
+    # 模拟历史数据（实际应该从验证结果中获取）
+    # 示例数据为固定值，图表只构建一次并在各次重跑间共享
+    
+    # 问题数量趋势
+    st.markdown("### 📊 问题数量趋势")
+    st.plotly_chart(_trend_problem_fig(), use_container_width=True)
+    
+    # 严重程度分布
+    st.markdown("### 🎯 问题严重程度分布")
+    st.plotly_chart(_trend_severity_fig(), use_container_width=True)
+    
+    # 问题类型分布
+    st.markdown("### 🔍 问题类型分布变化")
+    st.plotly_chart(_trend_type_fig(), use_container_width=True)
     
     # 改进效果分析
     st.markdown("### 📈 改进效果分析")
@@ -816,6 +1008,7 @@ def show_trend_analysis_page(validator):
             st.markdown(insight['description'])
 
 
+@st.fragment
 def show_analysis_page(analyzer):
     """显示智能分析页面"""
     
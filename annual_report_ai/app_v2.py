@@ -6,23 +6,32 @@
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import numpy as np
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, TYPE_CHECKING
 import sys
 import os
+import re
+import math
 import tempfile
+import hashlib
+import shutil
+from functools import lru_cache
+from itertools import compress
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 # 添加当前目录到路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from annual_report_ai.financial_reconciliation import FinancialReconciliation
-from annual_report_ai.enhanced_text_checker import EnhancedTextChecker
+# 核心模块在 initialize_system 中延迟导入，避免拖慢首屏渲染
+if TYPE_CHECKING:
+    from annual_report_ai.financial_reconciliation import FinancialReconciliation
+    from annual_report_ai.enhanced_text_checker import EnhancedTextChecker
 
 
-# 自定义CSS
-st.markdown("""
+# 自定义CSS（模块加载时构建一次）
+CUSTOM_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -65,20 +74,211 @@ st.markdown("""
         border-radius: 3px;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# 首页静态内容
+HOME_FEATURES_MD = """
+    ### 🎯 核心功能
+    
+    **1. 数据勾稽验证**
+    - 上传Excel格式的财务报表
+    - 同年度不同报表间勾稽关系验证
+    - 跨年度数据一致性验证
+    - 详细的公式、项目和数值展示
+    
+    **2. 文字内容检查**
+    - 上传PDF格式的年报文档
+    - 语法错误检测
+    - 术语一致性检查
+    - 表述规范性验证
+    - 完整上下文展示和错误高亮
+    """
+
+HOME_RECONCILIATION_CARD = """
+        <div class="metric-card">
+            <h4>📊 数据勾稽验证</h4>
+            <ul>
+                <li>资产负债表内部勾稽</li>
+                <li>利润表与资产负债表勾稽</li>
+                <li>净资产变动表勾稽</li>
+                <li>跨年度数据一致性验证</li>
+            </ul>
+            <p><strong>支持格式</strong>: Excel (.xlsx, .xls)</p>
+        </div>
+        """
+
+HOME_TEXT_CHECK_CARD = """
+        <div class="metric-card">
+            <h4>📝 文字内容检查</h4>
+            <ul>
+                <li>语法错误检测</li>
+                <li>术语一致性检查</li>
+                <li>表述规范性验证</li>
+                <li>完整上下文展示</li>
+            </ul>
+            <p><strong>支持格式</strong>: PDF (.pdf)</p>
+        </div>
+        """
+
+HOME_QUICK_START_MD = """
+    1. 点击左侧菜单选择功能模块
+    2. 上传相应格式的文件
+    3. 查看验证结果和详细报告
+    4. 根据建议进行修正
+    """
+
+
+def _inject_css():
+    """注入自定义CSS（重跑时未输出的元素会被清除，故每次运行都需注入）"""
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 
 @st.cache_resource
 def initialize_system():
-    """初始化系统（缓存）"""
+    """初始化系统（缓存，核心模块在此首次导入）"""
+    from annual_report_ai.financial_reconciliation import FinancialReconciliation
+    from annual_report_ai.enhanced_text_checker import EnhancedTextChecker
+    
     reconciliation = FinancialReconciliation(tolerance=0.01)
     text_checker = EnhancedTextChecker()
     return reconciliation, text_checker
 
 
+# 勾稽验证结果表的列映射（结果字段 -> 显示列名）
+SAME_YEAR_COLUMNS = {
+    'category': '勾稽类别',
+    'name': '验证项目',
+    'formula': '勾稽公式',
+    'difference': '差异金额',
+    'status': '验证状态'
+}
+
+# 跨年度对比结果表的列映射（结果字段 -> 显示列名）
+CROSS_YEAR_COLUMNS = {
+    'item': '项目',
+    'current_year_comparable': '当年的上年度可比区间数值',
+    'previous_year_current': '上一年度的本期数值',
+    'difference': '差异',
+    'status': '状态'
+}
+
+# 结果表数值列的显示格式（由前端格式化，数据保持为浮点数，可按数值排序）
+AMOUNT_COLUMN = st.column_config.NumberColumn(format='%,.2f')
+SAME_YEAR_COLUMN_CONFIG = {'差异金额': AMOUNT_COLUMN}
+CROSS_YEAR_COLUMN_CONFIG = {
+    '当年的上年度可比区间数值': AMOUNT_COLUMN,
+    '上一年度的本期数值': AMOUNT_COLUMN,
+    '差异': AMOUNT_COLUMN
+}
+
+# 文件名中的年份
+YEAR_PATTERN = re.compile(r'20\d{2}')
+
+# 文字检查结果每页显示的问题数
+ISSUES_PER_PAGE = 25
+
+# 批量加载Excel的最大线程数
+MAX_LOAD_WORKERS = 4
+
+# 上传文件写入临时文件时的分块大小
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Excel解析结果缓存的最大条目数
+EXCEL_CACHE_MAX_ENTRIES = 64
+
+# Excel解析结果缓存的过期时间（秒）
+EXCEL_CACHE_TTL = 7 * 24 * 3600
+
+
+def _save_upload_to_temp(uploaded_file, suffix: str) -> str:
+    """
+    将上传文件分块写入临时文件
+    
+    返回:
+        临时文件路径
+    """
+    uploaded_file.seek(0)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix,
+                                     buffering=UPLOAD_CHUNK_SIZE) as tmp_file:
+        shutil.copyfileobj(uploaded_file, tmp_file, length=UPLOAD_CHUNK_SIZE)
+        return tmp_file.name
+
+
+@st.cache_data(show_spinner=False, persist="disk",
+               max_entries=EXCEL_CACHE_MAX_ENTRIES, ttl=EXCEL_CACHE_TTL)
+def _load_excel_cached(_reconciliation, _uploaded_file, digest: str) -> dict:
+    """
+    加载上传的Excel财务报表（按文件内容哈希缓存，并持久化到磁盘）
+    
+    同一文件在重跑、重复上传或服务重启后都不再重新解析Excel。
+    数据解析后已在内存中，临时文件用完即删。
+    
+    返回:
+        {'sheets': 工作表字典, 'financial_data': 财务数据字典}
+    """
+    # 保存到临时文件
+    tmp_path = _save_upload_to_temp(_uploaded_file, '.xlsx')
+    
+    try:
+        sheets = _reconciliation.load_excel_data(tmp_path)
+        financial_data = _reconciliation.extract_financial_data(sheets)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    
+    return {
+        'sheets': sheets,
+        'financial_data': financial_data
+    }
+
+
+@st.cache_data(show_spinner=False)
+def _extract_pdf_text_cached(_text_checker, _uploaded_file, digest: str) -> dict:
+    """提取上传PDF的文本（按文件内容哈希缓存，临时文件用完即删）"""
+    tmp_path = _save_upload_to_temp(_uploaded_file, '.pdf')
+    try:
+        return _text_checker.extract_text_from_pdf(tmp_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+@st.cache_data(show_spinner=False)
+def _cached_highlight_contexts(_text_checker, _issues: list, digest: str,
+                               issue_type: str) -> list:
+    """批量生成问题上下文的高亮HTML（按PDF文件内容哈希和问题类型缓存）"""
+    return [
+        _text_checker.highlight_error_in_text(issue['context'], *issue['error_position'])
+        for issue in _issues
+    ]
+
+
+@st.cache_data(show_spinner=False)
+def _cached_check_text(_text_checker, _text_data: dict, digest: str) -> list:
+    """带上下文的文字检查（按PDF文件内容哈希缓存）"""
+    return _text_checker.check_text_with_context(_text_data)
+
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def _cached_validate_reconciliation(_reconciliation, _financial_data: dict, digest: str,
+                                    tolerance: float) -> list:
+    """同年度勾稽验证（按Excel文件内容哈希和容忍度缓存，无需再哈希财务数据）"""
+    return _reconciliation.validate_reconciliation(_financial_data)
+
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def _cached_validate_cross_year(_reconciliation, _current_data: dict, _previous_data: dict,
+                                current_digest: str, previous_digest: str,
+                                tolerance: float) -> list:
+    """跨年度一致性验证（按两年Excel文件内容哈希和容忍度缓存）"""
+    return _reconciliation.validate_cross_year_consistency(_current_data, _previous_data)
+
+
 def main():
     """主函数"""
     
+    _inject_css()
+    
     # 标题
     st.markdown('<div class="main-header">📄 年报核对AI助手</div>', unsafe_allow_html=True)
     st.markdown("---")
@@ -117,67 +317,25 @@ def show_home_page():
     
     st.markdown("## 📊 系统概览")
     
-    st.markdown("""
-    ### 🎯 核心功能
-    
-    **1. 数据勾稽验证**
-    - 上传Excel格式的财务报表
-    - 同年度不同报表间勾稽关系验证
-    - 跨年度数据一致性验证
-    - 详细的公式、项目和数值展示
-    
-    **2. 文字内容检查**
-    - 上传PDF格式的年报文档
-    - 语法错误检测
-    - 术语一致性检查
-    - 表述规范性验证
-    - 完整上下文展示和错误高亮
-    """)
+    st.markdown(HOME_FEATURES_MD)
     
     st.markdown("---")
     
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown("""
-        <div class="metric-card">
-            <h4>📊 数据勾稽验证</h4>
-            <ul>
-                <li>资产负债表内部勾稽</li>
-                <li>利润表与资产负债表勾稽</li>
-                <li>净资产变动表勾稽</li>
-                <li>跨年度数据一致性验证</li>
-            </ul>
-            <p><strong>支持格式</strong>: Excel (.xlsx, .xls)</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(HOME_RECONCILIATION_CARD, unsafe_allow_html=True)
     
     with col2:
-        st.markdown("""
-        <div class="metric-card">
-            <h4>📝 文字内容检查</h4>
-            <ul>
-                <li>语法错误检测</li>
-                <li>术语一致性检查</li>
-                <li>表述规范性验证</li>
-                <li>完整上下文展示</li>
-            </ul>
-            <p><strong>支持格式</strong>: PDF (.pdf)</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(HOME_TEXT_CHECK_CARD, unsafe_allow_html=True)
     
     st.markdown("---")
     
     st.markdown("### 🚀 快速开始")
-    st.markdown("""
-    1. 点击左侧菜单选择功能模块
-    2. 上传相应格式的文件
-    3. 查看验证结果和详细报告
-    4. 根据建议进行修正
-    """)
+    st.markdown(HOME_QUICK_START_MD)
 
 
-def show_reconciliation_page(reconciliation: FinancialReconciliation):
+def show_reconciliation_page(reconciliation: 'FinancialReconciliation'):
     """显示数据勾稽验证页面"""
     
     st.markdown("## 📊 数据勾稽验证")
@@ -201,46 +359,50 @@ def show_reconciliation_page(reconciliation: FinancialReconciliation):
         if 'financial_reports' not in st.session_state:
             st.session_state.financial_reports = {}
         
-        # 处理上传的文件
-        for uploaded_file in uploaded_files:
-            file_name = uploaded_file.name
-            
-            # 保存到临时文件
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-                tmp_file.write(uploaded_file.getbuffer())
-                tmp_path = tmp_file.name
-            
-            try:
-                # 加载Excel数据
-                with st.spinner(f"正在加载 {file_name}..."):
-                    sheets = reconciliation.load_excel_data(tmp_path)
-                    financial_data = reconciliation.extract_financial_data(sheets)
-                    
-                    st.session_state.financial_reports[file_name] = {
-                        'sheets': sheets,
-                        'financial_data': financial_data,
-                        'file_path': tmp_path
-                    }
+        # 并发加载所有文件，结果仍按上传顺序展示
+        with st.spinner(f"正在加载 {len(uploaded_files)} 个文件..."):
+            with ThreadPoolExecutor(max_workers=min(MAX_LOAD_WORKERS, len(uploaded_files))) as executor:
+                futures = []
+                for uploaded_file in uploaded_files:
+                    digest = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+                    futures.append((
+                        uploaded_file.name, digest,
+                        executor.submit(_load_excel_cached, reconciliation, uploaded_file, digest)
+                    ))
                 
-                # 显示文件信息
-                with st.expander(f"📄 {file_name}"):
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("工作表数量", len(sheets))
-                    with col2:
-                        st.metric("提取数据项", len(financial_data))
-                    with col3:
+                summary_rows = []
+                for file_name, digest, future in futures:
+                    try:
+                        # 加载Excel数据（按文件内容缓存）
+                        report_data = future.result()
+                        report_data['digest'] = digest
+                        sheets = report_data['sheets']
+                        financial_data = report_data['financial_data']
+                        
+                        st.session_state.financial_reports[file_name] = report_data
+                        
                         year = extract_year_from_filename(file_name)
-                        st.metric("年份", year if year else "未识别")
+                        summary_rows.append({
+                            '文件': file_name,
+                            '工作表数量': len(sheets),
+                            '提取数据项': len(financial_data),
+                            '年份': year if year else "未识别",
+                            '包含的工作表': '、'.join(sheets.keys())
+                        })
                     
-                    st.markdown("**包含的工作表**:")
-                    for sheet_name in sheets.keys():
-                        st.text(f"  • {sheet_name}")
-            
-            except Exception as e:
-                st.error(f"加载 {file_name} 失败: {str(e)}")
-                if os.path.exists(tmp_path):
-                    os.remove(tmp_path)
+                    except Exception as e:
+                        st.error(f"加载 {file_name} 失败: {str(e)}")
+        
+        # 汇总显示文件信息（单个表格，不再为每个文件创建一组组件）
+        if summary_rows:
+            summary_df = pd.DataFrame(summary_rows)
+            st.dataframe(
+                summary_df.drop(columns='包含的工作表'),
+                use_container_width=True,
+                hide_index=True
+            )
+            with st.expander("查看工作表清单"):
+                st.table(summary_df[['文件', '包含的工作表']].set_index('文件'))
         
         st.markdown("---")
         
@@ -258,7 +420,7 @@ def show_reconciliation_page(reconciliation: FinancialReconciliation):
             show_cross_year_validation(reconciliation)
 
 
-def show_same_year_validation(reconciliation: FinancialReconciliation):
+def show_same_year_validation(reconciliation: 'FinancialReconciliation'):
     """显示同年度报表勾稽验证"""
     
     st.markdown("#### 同年度报表勾稽验证")
@@ -278,19 +440,22 @@ def show_same_year_validation(reconciliation: FinancialReconciliation):
             financial_data = report_data['financial_data']
             
             # 执行勾稽验证
-            results = reconciliation.validate_reconciliation(financial_data)
+            results = _cached_validate_reconciliation(
+                reconciliation, financial_data, report_data['digest'], reconciliation.tolerance
+            )
             
             # 显示验证结果
             if results:
-                # 统计信息
-                passed = [r for r in results if r['is_pass']]
-                failed = [r for r in results if not r['is_pass']]
+                # 统计信息（一次生成通过掩码，表格着色时复用）
+                passed = np.fromiter((r['is_pass'] for r in results), dtype=bool, count=len(results))
+                n_pass = int(passed.sum())
+                failed = list(compress(results, ~passed))
                 
                 col1, col2, col3 = st.columns(3)
                 with col1:
                     st.metric("验证项目总数", len(results))
                 with col2:
-                    st.metric("✓ 通过", len(passed), delta=f"{len(passed)/len(results)*100:.1f}%")
+                    st.metric("✓ 通过", n_pass, delta=f"{n_pass/len(results)*100:.1f}%")
                 with col3:
                     st.metric("❌ 不通过", len(failed), 
                              delta=f"{len(failed)/len(results)*100:.1f}%", 
@@ -301,37 +466,24 @@ def show_same_year_validation(reconciliation: FinancialReconciliation):
                 # 显示详细结果
                 st.markdown("### 📋 详细验证结果")
                 
-                # 创建结果表格
-                result_data = []
-                for result in results:
-                    result_data.append({
-                        '勾稽类别': result['category'],
-                        '验证项目': result['name'],
-                        '勾稽公式': result['formula'],
-                        '差异金额': f"{result['difference']:,.2f}",
-                        '验证状态': result['status']
-                    })
-                
-                result_df = pd.DataFrame(result_data)
+                # 创建结果表格（数值列保持为浮点数，仅在显示时格式化）
+                result_df = pd.DataFrame.from_records(
+                    results, columns=list(SAME_YEAR_COLUMNS)
+                )
+                result_df = result_df.rename(columns=SAME_YEAR_COLUMNS)
                 
                 # 使用颜色标记状态
-                def highlight_status(row):
-                    if '✓' in row['验证状态']:
-                        return ['background-color: #d4edda'] * len(row)
-                    else:
-                        return ['background-color: #f8d7da'] * len(row)
-                
                 st.dataframe(
-                    result_df.style.apply(highlight_status, axis=1),
+                    result_df.style.apply(highlight_status, axis=None, passed=passed),
+                    column_config=SAME_YEAR_COLUMN_CONFIG,
                     use_container_width=True,
                     height=400
                 )
                 
                 # 下载按钮
-                csv = result_df.to_csv(index=False, encoding='utf-8-sig')
                 st.download_button(
                     label="📥 下载验证结果（CSV）",
-                    data=csv,
+                    data=_to_csv_bytes(result_df),
                     file_name=f"勾稽验证结果_{selected_report}.csv",
                     mime="text/csv"
                 )
@@ -349,11 +501,10 @@ def show_same_year_validation(reconciliation: FinancialReconciliation):
                             st.markdown(f"**勾稽公式**: `{result['formula']}`")
                             
                             st.markdown("**涉及项目及数值**:")
-                            values_df = pd.DataFrame([
-                                {'项目': k, '金额（元）': f"{v:,.2f}"} 
-                                for k, v in result['values'].items()
-                            ])
-                            st.table(values_df)
+                            values_df = pd.Series(
+                                result['values'], name='金额（元）', dtype=float
+                            ).rename_axis('项目').reset_index()
+                            st.table(values_df.style.format({'金额（元）': '{:,.2f}'}))
                             
                             st.markdown(f"**差异金额**: {result['difference']:,.2f} 元")
                             
@@ -369,7 +520,7 @@ def show_same_year_validation(reconciliation: FinancialReconciliation):
                 st.warning("未能执行验证，请检查报表数据是否完整")
 
 
-def show_cross_year_validation(reconciliation: FinancialReconciliation):
+def show_cross_year_validation(reconciliation: 'FinancialReconciliation'):
     """显示跨年度数据一致性验证"""
     
     st.markdown("#### 跨年度数据一致性验证")
@@ -403,21 +554,24 @@ def show_cross_year_validation(reconciliation: FinancialReconciliation):
             previous_data = reports[previous_report]['financial_data']
             
             # 执行跨年度验证
-            results = reconciliation.validate_cross_year_consistency(
-                current_data, previous_data
+            results = _cached_validate_cross_year(
+                reconciliation, current_data, previous_data,
+                reports[current_report]['digest'], reports[previous_report]['digest'],
+                reconciliation.tolerance
             )
             
             # 显示验证结果
             if results:
-                # 统计信息
-                passed = [r for r in results if r['is_pass']]
-                failed = [r for r in results if not r['is_pass']]
+                # 统计信息（一次生成通过掩码，表格着色时复用）
+                passed = np.fromiter((r['is_pass'] for r in results), dtype=bool, count=len(results))
+                n_pass = int(passed.sum())
+                failed = list(compress(results, ~passed))
                 
                 col1, col2, col3 = st.columns(3)
                 with col1:
                     st.metric("验证项目总数", len(results))
                 with col2:
-                    st.metric("✓ 一致", len(passed), delta=f"{len(passed)/len(results)*100:.1f}%")
+                    st.metric("✓ 一致", n_pass, delta=f"{n_pass/len(results)*100:.1f}%")
                 with col3:
                     st.metric("❌ 不一致", len(failed),
                              delta=f"{len(failed)/len(results)*100:.1f}%",
@@ -428,37 +582,24 @@ def show_cross_year_validation(reconciliation: FinancialReconciliation):
                 # 显示完整对比表格
                 st.markdown("### 📊 完整对比数据")
                 
-                result_data = []
-                for result in results:
-                    # 统一格式：项目 - 当年的上年度可比区间数值 - 上一年度的本期数值 - 差异 - 状态
-                    result_data.append({
-                        '项目': result['item'],
-                        '当年的上年度可比区间数值': f"{result['current_year_comparable']:,.2f}",
-                        '上一年度的本期数值': f"{result['previous_year_current']:,.2f}",
-                        '差异': f"{result['difference']:,.2f}",
-                        '状态': result['status']
-                    })
-                
-                result_df = pd.DataFrame(result_data)
+                # 统一格式：项目 - 当年的上年度可比区间数值 - 上一年度的本期数值 - 差异 - 状态
+                result_df = pd.DataFrame.from_records(
+                    results, columns=list(CROSS_YEAR_COLUMNS)
+                )
+                result_df = result_df.rename(columns=CROSS_YEAR_COLUMNS)
                 
                 # 使用颜色标记状态
-                def highlight_status(row):
-                    if '✓' in row['状态']:
-                        return ['background-color: #d4edda'] * len(row)
-                    else:
-                        return ['background-color: #f8d7da'] * len(row)
-                
                 st.dataframe(
-                    result_df.style.apply(highlight_status, axis=1),
+                    result_df.style.apply(highlight_status, axis=None, passed=passed),
+                    column_config=CROSS_YEAR_COLUMN_CONFIG,
                     use_container_width=True,
                     height=400
                 )
                 
                 # 下载按钮
-                csv = result_df.to_csv(index=False, encoding='utf-8-sig')
                 st.download_button(
                     label="📥 下载对比结果（CSV）",
-                    data=csv,
+                    data=_to_csv_bytes(result_df),
                     file_name=f"跨年度对比_{current_report}_vs_{previous_report}.csv",
                     mime="text/csv"
                 )
@@ -493,7 +634,7 @@ def show_cross_year_validation(reconciliation: FinancialReconciliation):
                 st.warning("未能执行验证，请检查报表数据是否完整")
 
 
-def show_text_check_page(text_checker: EnhancedTextChecker):
+def show_text_check_page(text_checker: 'EnhancedTextChecker'):
     """显示文字内容检查页面"""
     
     st.markdown("## 📝 文字内容检查")
@@ -512,26 +653,32 @@ def show_text_check_page(text_checker: EnhancedTextChecker):
     if uploaded_file:
         st.success(f"已上传: {uploaded_file.name}")
         
-        # 保存到临时文件
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(uploaded_file.getbuffer())
-            tmp_path = tmp_file.name
+        digest = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
         
+        # 记录已检查的文件，翻页等交互重跑时继续显示结果（检查结果已缓存）
         if st.button("开始检查", type="primary"):
+            st.session_state.text_check_digest = digest
+        
+        if st.session_state.get('text_check_digest') == digest:
             try:
                 with st.spinner("正在提取PDF文本..."):
-                    # 提取PDF文本
-                    text_data = text_checker.extract_text_from_pdf(tmp_path)
+                    # 提取PDF文本（按文件内容缓存）
+                    text_data = _extract_pdf_text_cached(text_checker, uploaded_file, digest)
                     
                     st.success(f"成功提取文本: {text_data['total_pages']} 页, {text_data['total_chars']} 字符")
                 
                 with st.spinner("正在检查文字内容..."):
-                    # 执行文字检查
-                    issues = text_checker.check_text_with_context(text_data)
+                    # 执行文字检查（按文件内容缓存）
+                    issues = _cached_check_text(text_checker, text_data, digest)
+                    
+                    # 按类型分组（单次遍历）
+                    issues_by_type = defaultdict(list)
+                    for issue in issues:
+                        issues_by_type[issue['type']].append(issue)
+                    grammar_issues = issues_by_type['语法问题']
+                    expression_issues = issues_by_type['表述问题']
                     
                     # 显示统计信息
-                    grammar_issues = [i for i in issues if i['type'] == '语法问题']
-                    expression_issues = [i for i in issues if i['type'] == '表述问题']
                     
                     col1, col2, col3 = st.columns(3)
                     with col1:
@@ -551,26 +698,21 @@ def show_text_check_page(text_checker: EnhancedTextChecker):
                         tab1, tab2 = st.tabs(["语法问题", "语病检查"])
                         
                         with tab1:
-                            show_issues_by_type(grammar_issues, text_checker, "语法问题")
+                            show_issues_by_type(grammar_issues, text_checker, "语法问题", digest)
                         
                         with tab2:
-                            show_issues_by_type(expression_issues, text_checker, "语病检查")
+                            show_issues_by_type(expression_issues, text_checker, "语病检查", digest)
                     
                     else:
                         st.success("✓ 未发现任何问题，文字内容规范！")
             
             except Exception as e:
                 st.error(f"检查失败: {str(e)}")
-            
-            finally:
-                # 清理临时文件
-                if os.path.exists(tmp_path):
-                    os.remove(tmp_path)
 
 
-def show_issues_by_type(issues: List[Dict], text_checker: EnhancedTextChecker, 
-                       issue_type: str):
-    """按类型显示问题"""
+def show_issues_by_type(issues: List[Dict], text_checker: 'EnhancedTextChecker', 
+                       issue_type: str, digest: str):
+    """按类型分页显示问题"""
     
     if not issues:
         st.success(f"✓ 未发现{issue_type}")
@@ -578,7 +720,20 @@ def show_issues_by_type(issues: List[Dict], text_checker: EnhancedTextChecker,
     
     st.warning(f"发现 {len(issues)} 个{issue_type}")
     
-    for idx, issue in enumerate(issues, 1):
+    highlighted_contexts = _cached_highlight_contexts(text_checker, issues, digest, issue_type)
+    
+    # 分页显示，每次只渲染当前页的问题
+    n_pages = math.ceil(len(issues) / ISSUES_PER_PAGE)
+    page = 1
+    if n_pages > 1:
+        page = st.number_input(
+            f"页码（共 {n_pages} 页）", min_value=1, max_value=n_pages, value=1,
+            key=f"issue_page_{issue_type}"
+        )
+    start = (page - 1) * ISSUES_PER_PAGE
+    end = start + ISSUES_PER_PAGE
+    
+    for idx, issue in enumerate(issues[start:end], start + 1):
         with st.expander(f"问题 {idx}: {issue['issue_name']} (第{issue['page_num']}页)"):
             st.markdown(f"**问题类型**: {issue['issue_name']}")
             st.markdown(f"**问题描述**: {issue['description']}")
@@ -589,11 +744,7 @@ def show_issues_by_type(issues: List[Dict], text_checker: EnhancedTextChecker,
             
             # 显示带高亮的上下文
             st.markdown("**上下文**:")
-            error_start, error_end = issue['error_position']
-            highlighted_context = text_checker.highlight_error_in_text(
-                issue['context'], error_start, error_end
-            )
-            st.markdown(highlighted_context, unsafe_allow_html=True)
+            st.markdown(highlighted_contexts[idx - 1], unsafe_allow_html=True)
             
             # 显示完整段落
             st.markdown("**完整段落**:")
@@ -605,10 +756,26 @@ def show_issues_by_type(issues: List[Dict], text_checker: EnhancedTextChecker,
                 st.markdown(f"**修改建议**: {issue['suggestion']}")
 
 
+@st.cache_data(show_spinner=False)
+def _to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """导出CSV（带BOM，便于Excel识别中文）"""
+    return df.to_csv(index=False).encode('utf-8-sig')
+
+
+def highlight_status(df: pd.DataFrame, passed: np.ndarray) -> pd.DataFrame:
+    """按验证结果为整行着色（一次性生成整张表的样式）"""
+    styles = np.where(passed[:, None], 'background-color: #d4edda', 'background-color: #f8d7da')
+    return pd.DataFrame(
+        np.broadcast_to(styles, df.shape),
+        index=df.index,
+        columns=df.columns
+    )
+
+
+@lru_cache(maxsize=256)
 def extract_year_from_filename(filename: str) -> Optional[str]:
     """从文件名中提取年份"""
-    import re
-    match = re.search(r'20\d{2}', filename)
+    match = YEAR_PATTERN.search(filename)
     return match.group() if match else None
 
 
@@ -5,13 +5,25 @@
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 import os
+import shutil
 import time
 import re
+import threading
 from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
+import importlib.util
 import logging
 
+# 优先使用selectolax的lexbor后端（C实现的HTML解析与CSS选择），未安装时使用BeautifulSoup
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -19,6 +31,105 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 默认下载的年报年份
+DEFAULT_YEARS = (2022, 2023, 2024)
+
+# 同时下载的基金数量
+MAX_FUND_WORKERS = 3
+
+# 同一基金同时下载的年报数量
+MAX_DOWNLOAD_WORKERS = 3
+
+# 请求限速：长期不超过每秒 REQUEST_RATE 次，允许最多 REQUEST_BURST 次的短时突发
+REQUEST_RATE = 5
+REQUEST_BURST = 5
+
+# 连接池大小（并发下载和探测共享同一会话的长连接，
+# 不小于 基金并发数 × 年份并发数 × URL探测数）
+HTTP_POOL_SIZE = 32
+
+# 请求失败时的重试策略（指数退避）
+HTTP_RETRY = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=[429, 500, 502, 503, 504]
+)
+
+# 连接预热的超时（秒）：(连接超时, 读取超时)，离线时尽快放弃
+WARM_UP_TIMEOUT = (2, 3)
+
+# BeautifulSoup的HTML解析器：优先使用lxml（C实现），未安装时使用标准库解析器
+HTML_PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+# 请求HTML页面时只接受HTML内容（压缩方式由requests按已安装的解码库自动声明）
+HTML_HEADERS = {'Accept': 'text/html,application/xhtml+xml'}
+
+# 年报PDF链接的CSS选择器
+PDF_LINK_SELECTOR = 'a[href$=".pdf"]'
+
+# 流式下载时每次复制的字节数，同时作为文件写入缓冲区大小
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# 不超过该大小（且长度已知）的文件一次性读取写入，不走分块循环
+SMALL_FILE_SIZE = 4 * 1024 * 1024
+
+# 小于该大小的文件视为错误页面
+MIN_PDF_SIZE = 1024
+
+# 下载中的临时文件后缀（下载完成后再重命名为正式文件名）
+PART_SUFFIX = '.part'
+
+# 年报文件名模板
+REPORT_FILENAME_TEMPLATE = "{code}_{year}年度报告.pdf"
+
+# 直接构建年报URL时尝试的常见模式（按优先级排列）
+REPORT_URL_TEMPLATES = (
+    "{base}/uploads/reports/{code}/{year}_annual_report.pdf",
+    "{base}/reports/{code}_{year}.pdf",
+    "{base}/disclosure/{code}/{year}年度报告.pdf"
+)
+
+# 年报链接文字的关键词（产品页面 / 信息披露页面）
+PRODUCT_REPORT_KEYWORDS = re.compile(r'年度报告|年报')
+DISCLOSURE_REPORT_KEYWORDS = re.compile(r'年度报告')
+
+# 链接文字中出现的所有四位数字（含重叠位置），用于识别年份
+YEAR_IN_TEXT_PATTERN = re.compile(r'(?=(\d{4}))')
+
+
+class RateLimiter:
+    """令牌桶限速器（线程安全）"""
+    
+    def __init__(self, rate, capacity):
+        """
+        初始化限速器
+        
+        参数:
+            rate: 每秒补充的令牌数
+            capacity: 令牌桶容量（允许的突发请求数）
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """获取一个令牌，令牌不足时等待到补充为止"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                
+                wait = (1 - self._tokens) / self.rate
+            
+            time.sleep(wait)
+
 
 class AnnualReportDownloader:
     """年报下载器"""
@@ -37,49 +148,103 @@ class AnnualReportDownloader:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
         
+        # 加大连接池，使并发请求复用长连接，避免重复建立TCP/TLS连接
+        # （重试策略在连接预热完成后再启用）
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_POOL_SIZE,
+            pool_maxsize=HTTP_POOL_SIZE,
+            max_retries=0
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # 所有请求共用的限速器，代替固定的请求间隔
+        self._limiter = RateLimiter(REQUEST_RATE, REQUEST_BURST)
+        
+        # 页面扫描结果 {(页面类型, 基金代码): 年份URL映射或请求异常}，各年份共用，每个页面只请求和扫描一次
+        self._page_cache = {}
+        self._page_locks = {}
+        self._page_locks_guard = threading.Lock()
+        
         # 创建输出目录
         os.makedirs(output_dir, exist_ok=True)
+        
+        # 预先建立到官网的连接，后续请求复用已完成DNS解析和TLS握手的连接
+        self._warm_up(adapter)
     
-    def download_fund_reports(self, fund_code, fund_name, years=[2022, 2023, 2024]):
+    def _warm_up(self, adapter):
+        """
+        向官网首页发送一次HEAD请求以预热连接池（失败不影响后续下载）
+        
+        预热请求不重试且使用较短的超时，离线时很快失败，不会拖慢初始化；
+        完成后再为适配器启用重试策略。
+        """
+        try:
+            self._request('HEAD', self.base_url, timeout=WARM_UP_TIMEOUT)
+        except Exception as e:
+            logger.debug("连接预热失败: %s", e)
+        finally:
+            adapter.max_retries = HTTP_RETRY
+    
+    def download_fund_reports(self, fund_code, fund_name, years=DEFAULT_YEARS):
         """
         下载指定基金的年报
         
         参数:
             fund_code: 基金代码
             fund_name: 基金名称
-            years: 年份列表
+            years: 年份序列
         
         返回:
             下载成功的文件列表
         """
-        logger.info(f"开始下载基金 {fund_code} ({fund_name}) 的年报...")
+        logger.info("开始下载基金 %s (%s) 的年报...", fund_code, fund_name)
         
         # 创建基金目录
         fund_dir = os.path.join(self.output_dir, fund_code)
         os.makedirs(fund_dir, exist_ok=True)
         
-        downloaded_files = []
-        
+        # 一次列出目录，已存在的年报直接计入结果，不再进入下载流程
+        existing_files = set(os.listdir(fund_dir))
+        report_files = {}
+        missing_years = []
         for year in years:
-            try:
-                # 尝试下载年报
-                file_path = self._download_single_report(
-                    fund_code, fund_name, year, fund_dir
-                )
-                
-                if file_path:
-                    downloaded_files.append(file_path)
-                    logger.info(f"✓ 成功下载: {os.path.basename(file_path)}")
-                else:
-                    logger.warning(f"✗ 未找到 {year} 年报")
-                
-                # 延迟避免请求过快
-                time.sleep(2)
-                
-            except Exception as e:
-                logger.error(f"✗ 下载 {year} 年报失败: {str(e)}")
+            filename = REPORT_FILENAME_TEMPLATE.format(code=fund_code, year=year)
+            if filename in existing_files:
+                report_files[year] = os.path.join(fund_dir, filename)
+            else:
+                missing_years.append(year)
+        
+        if not missing_years:
+            logger.info("全部 %s 个年报已存在，跳过下载", len(years))
+            return list(report_files.values())
+        
+        # 各年份并发下载，结果仍按年份顺序汇总
+        with ThreadPoolExecutor(max_workers=min(MAX_DOWNLOAD_WORKERS, len(missing_years))) as executor:
+            futures = [
+                (year, executor.submit(
+                    self._download_single_report, fund_code, fund_name, year, fund_dir
+                ))
+                for year in missing_years
+            ]
+            
+            for year, future in futures:
+                try:
+                    # 尝试下载年报
+                    file_path = future.result()
+                    
+                    if file_path:
+                        report_files[year] = file_path
+                        logger.info("✓ 成功下载: %s", os.path.basename(file_path))
+                    else:
+                        logger.warning("✗ 未找到 %s 年报", year)
+                    
+                except Exception as e:
+                    logger.error("✗ 下载 %s 年报失败: %s", year, e)
+        
+        downloaded_files = [report_files[year] for year in years if year in report_files]
         
-        logger.info(f"完成！共下载 {len(downloaded_files)}/{len(years)} 个文件")
+        logger.info("完成！共下载 %s/%s 个文件", len(downloaded_files), len(years))
         return downloaded_files
     
     def _download_single_report(self, fund_code, fund_name, year, output_dir):
@@ -96,12 +261,12 @@ class AnnualReportDownloader:
             文件路径或None
         """
         # 构建文件名
-        filename = f"{fund_code}_{year}年度报告.pdf"
+        filename = REPORT_FILENAME_TEMPLATE.format(code=fund_code, year=year)
         file_path = os.path.join(output_dir, filename)
         
         # 如果文件已存在，跳过
         if os.path.exists(file_path):
-            logger.info(f"文件已存在，跳过: {filename}")
+            logger.info("文件已存在，跳过: %s", filename)
             return file_path
         
         # 方法1: 尝试通过产品页面查找
@@ -111,140 +276,264 @@ class AnnualReportDownloader:
         if not report_url:
             report_url = self._find_report_url_from_disclosure_page(fund_code, year)
         
-        # 方法3: 如果都失败，尝试直接构建URL
+        # 方法3: 如果都失败，尝试直接构建URL（同时得到探测时的HEAD响应）
+        head = None
         if not report_url:
-            report_url = self._construct_direct_url(fund_code, year)
+            report_url, head = self._construct_direct_url(fund_code, year)
         
         # 下载文件
         if report_url:
-            return self._download_file(report_url, file_path)
+            return self._download_file(report_url, file_path, head=head)
         
         return None
     
+    def _request(self, method, url, **kwargs):
+        """
+        发送HTTP请求（经限速器控制请求频率）
+        
+        与 session.head 一致，HEAD 请求默认不跟随重定向，
+        避免探测时把跳转到的"未找到"页面误判为有效地址。
+        """
+        if method == 'HEAD':
+            kwargs.setdefault('allow_redirects', False)
+        self._limiter.acquire()
+        return self.session.request(method, url, **kwargs)
+    
+    def _get_cached(self, key, loader):
+        """
+        获取按键缓存的结果（本实例内缓存）
+        
+        并发请求同一键时只有一个线程实际执行loader，其余线程等待并复用结果；
+        执行失败时缓存异常并重新抛出，避免重复请求不可用的页面。
+        """
+        with self._page_locks_guard:
+            key_lock = self._page_locks.setdefault(key, threading.Lock())
+        
+        with key_lock:
+            if key not in self._page_cache:
+                try:
+                    self._page_cache[key] = loader()
+                except Exception as e:
+                    self._page_cache[key] = e
+            
+            result = self._page_cache[key]
+        
+        if isinstance(result, Exception):
+            raise result
+        return result
+    
+    def _get_pdf_links(self, url):
+        """
+        获取HTML页面中的所有PDF链接
+        
+        返回:
+            [(链接文字, href), ...]，按页面中出现的顺序
+        """
+        response = self._request('GET', url, timeout=10, headers=HTML_HEADERS)
+        response.raise_for_status()
+        
+        if LexborHTMLParser is not None:
+            tree = LexborHTMLParser(response.content)
+            return [
+                (node.text(strip=True), node.attributes['href'])
+                for node in tree.css(PDF_LINK_SELECTOR)
+            ]
+        
+        soup = BeautifulSoup(response.content, HTML_PARSER)
+        return [
+            (link.get_text(strip=True), link['href'])
+            for link in soup.select(PDF_LINK_SELECTOR)
+        ]
+    
+    def _extract_year_url_map(self, links, keyword_pattern):
+        """
+        单次遍历页面中的PDF链接，按年份归集年报URL
+        
+        链接文字需同时包含年份和关键词；同一年份有多个链接时取页面中的第一个。
+        
+        返回:
+            {年份字符串: 年报URL}
+        """
+        url_map = {}
+        
+        for text, href in links:
+            if not keyword_pattern.search(text):
+                continue
+            
+            report_url = urljoin(self.base_url, href)
+            for year in YEAR_IN_TEXT_PATTERN.findall(text):
+                url_map.setdefault(year, report_url)
+        
+        return url_map
+    
+    def _scan_product_page(self, fund_code):
+        """扫描产品页面，得到各年份的年报URL（每个基金只扫描一次）"""
+        product_url = f"{self.base_url}/products/{fund_code}"
+        
+        # 年报链接通常在"信息披露"或"公告"栏目
+        return self._get_cached(
+            ('product', fund_code),
+            lambda: self._extract_year_url_map(self._get_pdf_links(product_url), PRODUCT_REPORT_KEYWORDS)
+        )
+    
+    def _scan_disclosure_page(self, fund_code):
+        """扫描信息披露页面，得到各年份的年报URL（每个基金只扫描一次）"""
+        disclosure_url = f"{self.base_url}/disclosure/{fund_code}"
+        
+        return self._get_cached(
+            ('disclosure', fund_code),
+            lambda: self._extract_year_url_map(self._get_pdf_links(disclosure_url), DISCLOSURE_REPORT_KEYWORDS)
+        )
+    
     def _find_report_url_from_product_page(self, fund_code, year):
         """从产品页面查找年报URL"""
         try:
-            # 构建产品页面URL
-            product_url = f"{self.base_url}/products/{fund_code}"
-            
-            response = self.session.get(product_url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # 查找年报链接
-            # 通常在"信息披露"或"公告"栏目
-            links = soup.find_all('a', href=True)
-            
-            for link in links:
-                href = link.get('href', '')
-                text = link.get_text(strip=True)
-                
-                # 匹配年报关键词
-                if f'{year}' in text and ('年度报告' in text or '年报' in text):
-                    if href.endswith('.pdf'):
-                        return urljoin(self.base_url, href)
-            
+            return self._scan_product_page(fund_code).get(str(year))
         except Exception as e:
-            logger.debug(f"从产品页面查找失败: {str(e)}")
+            logger.debug("从产品页面查找失败: %s", e)
         
         return None
     
     def _find_report_url_from_disclosure_page(self, fund_code, year):
         """从信息披露页面查找年报URL"""
         try:
-            # 构建信息披露页面URL
-            disclosure_url = f"{self.base_url}/disclosure/{fund_code}"
-            
-            response = self.session.get(disclosure_url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # 查找年报链接
-            links = soup.find_all('a', href=True)
-            
-            for link in links:
-                href = link.get('href', '')
-                text = link.get_text(strip=True)
-                
-                if f'{year}' in text and '年度报告' in text:
-                    if href.endswith('.pdf'):
-                        return urljoin(self.base_url, href)
-            
+            return self._scan_disclosure_page(fund_code).get(str(year))
         except Exception as e:
-            logger.debug(f"从信息披露页面查找失败: {str(e)}")
+            logger.debug("从信息披露页面查找失败: %s", e)
         
         return None
     
     def _construct_direct_url(self, fund_code, year):
-        """尝试直接构建URL"""
+        """
+        尝试直接构建URL
+        
+        返回:
+            (URL, HEAD响应)，未找到时为 (None, None)
+        """
         # 常见的URL模式
         patterns = [
-            f"{self.base_url}/uploads/reports/{fund_code}/{year}_annual_report.pdf",
-            f"{self.base_url}/reports/{fund_code}_{year}.pdf",
-            f"{self.base_url}/disclosure/{fund_code}/{year}年度报告.pdf"
+            template.format(base=self.base_url, code=fund_code, year=year)
+            for template in REPORT_URL_TEMPLATES
         ]
         
-        for url in patterns:
-            try:
-                response = self.session.head(url, timeout=5)
-                if response.status_code == 200:
-                    return url
-            except:
-                continue
+        # 并发探测所有模式，按模式优先级取第一个可用的URL
+        executor = ThreadPoolExecutor(max_workers=len(patterns))
+        try:
+            futures = [executor.submit(self._request, 'HEAD', url, timeout=5) for url in patterns]
+            
+            for url, future in zip(patterns, futures):
+                try:
+                    response = future.result()
+                    if response.status_code == 200:
+                        return url, response
+                except Exception:
+                    continue
+        finally:
+            # 已找到结果时不再等待其余探测
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        return None
+        return None, None
     
-    def _download_file(self, url, file_path):
+    def _get_content_length(self, response):
+        """获取响应的文件大小（响应被压缩或长度未知时返回0）"""
+        if 'Content-Encoding' in response.headers:
+            return 0
+        return int(response.headers.get('Content-Length') or 0)
+    
+    def _check_pdf_response(self, response):
+        """根据响应头检查是否为有效的PDF文件（类型为PDF且已知大小不过小）"""
+        # 检查是否是PDF文件
+        content_type = response.headers.get('Content-Type', '')
+        if 'pdf' not in content_type.lower():
+            logger.warning("文件类型不是PDF: %s", content_type)
+            return False
+        
+        # 已知过小时直接放弃，不写入磁盘
+        content_length = self._get_content_length(response)
+        if 0 < content_length < MIN_PDF_SIZE:
+            logger.warning("文件太小，可能下载失败: %s bytes", content_length)
+            return False
+        
+        return True
+    
+    def _preallocate(self, f, size):
+        """为文件预分配磁盘空间（不支持posix_fallocate的平台退化为truncate）"""
+        try:
+            os.posix_fallocate(f.fileno(), 0, size)
+        except (AttributeError, OSError):
+            f.truncate(size)
+    
+    def _download_file(self, url, file_path, head=None):
         """
         下载文件
         
         参数:
             url: 文件URL
             file_path: 保存路径
+            head: 该URL已有的HEAD响应（可选），提供时据此预先检查，无需再检查GET响应头
         
         返回:
             文件路径或None
         """
+        # 先写入临时文件，完整下载后再重命名，中断时不会留下看似完整的PDF
+        part_path = file_path + PART_SUFFIX
+        
         try:
-            response = self.session.get(url, timeout=30, stream=True)
+            # 根据HEAD响应即可判断无效时，不再发起GET请求
+            if head is not None and not self._check_pdf_response(head):
+                return None
+            
+            response = self._request('GET', url, timeout=30, stream=True)
             response.raise_for_status()
             
-            # 检查是否是PDF文件
-            content_type = response.headers.get('Content-Type', '')
-            if 'pdf' not in content_type.lower():
-                logger.warning(f"文件类型不是PDF: {content_type}")
+            if head is None and not self._check_pdf_response(response):
                 return None
             
+            content_length = self._get_content_length(response)
+            
             # 保存文件
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+            with open(part_path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+                if 0 < content_length <= SMALL_FILE_SIZE:
+                    # 小文件一次读取、一次写入
+                    f.write(response.content)
+                else:
+                    # 已知大小时预先分配磁盘空间，写入时不再逐次扩展文件
+                    if content_length > 0:
+                        self._preallocate(f, content_length)
+                    
+                    # 直接从底层连接复制到文件（由urllib3解压），不经过逐块迭代
+                    response.raw.decode_content = True
+                    shutil.copyfileobj(response.raw, f, length=WRITE_BUFFER_SIZE)
+                    
+                    # 以实际写入的内容为准，去掉预分配多出的部分
+                    f.truncate()
+                
+                # 已写入的字节数即文件大小，无需再读取文件信息
+                file_size = f.tell()
             
             # 验证文件大小
-            file_size = os.path.getsize(file_path)
-            if file_size < 1024:  # 小于1KB可能是错误页面
-                os.remove(file_path)
-                logger.warning(f"文件太小，可能下载失败: {file_size} bytes")
+            if file_size < MIN_PDF_SIZE:  # 小于1KB可能是错误页面
+                os.remove(part_path)
+                logger.warning("文件太小，可能下载失败: %s bytes", file_size)
                 return None
             
-            logger.info(f"文件大小: {file_size / 1024 / 1024:.2f} MB")
+            os.replace(part_path, file_path)
+            
+            logger.info("文件大小: %.2f MB", file_size / 1024 / 1024)
             return file_path
             
         except Exception as e:
-            logger.error(f"下载文件失败: {str(e)}")
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            logger.error("下载文件失败: %s", e)
+            if os.path.exists(part_path):
+                os.remove(part_path)
             return None
     
-    def download_recommended_funds(self, years=[2022, 2023, 2024]):
+    def download_recommended_funds(self, years=DEFAULT_YEARS):
         """
         下载推荐的基金年报
         
         参数:
-            years: 年份列表
+            years: 年份序列
         
         返回:
             下载统计信息
@@ -267,28 +556,33 @@ class AnnualReportDownloader:
         
         logger.info("=" * 60)
         logger.info("开始批量下载年报...")
-        logger.info(f"基金数量: {len(funds)}")
-        logger.info(f"年份范围: {years}")
+        logger.info("基金数量: %s", len(funds))
+        logger.info("年份范围: %s", years)
         logger.info("=" * 60)
         
         all_downloaded = []
         
-        for fund in funds:
-            logger.info("")
-            downloaded = self.download_fund_reports(
-                fund['code'],
-                fund['name'],
-                years
-            )
-            all_downloaded.extend(downloaded)
-            logger.info("-" * 60)
+        # 各基金并发下载，结果按基金顺序汇总
+        with ThreadPoolExecutor(max_workers=min(MAX_FUND_WORKERS, len(funds))) as executor:
+            futures = [
+                executor.submit(
+                    self.download_fund_reports,
+                    fund['code'],
+                    fund['name'],
+                    years
+                )
+                for fund in funds
+            ]
+            
+            for future in futures:
+                all_downloaded.extend(future.result())
         
         # 统计信息
         logger.info("")
         logger.info("=" * 60)
         logger.info("下载完成！")
-        logger.info(f"总计下载: {len(all_downloaded)} 个文件")
-        logger.info(f"保存位置: {os.path.abspath(self.output_dir)}")
+        logger.info("总计下载: %s 个文件", len(all_downloaded))
+        logger.info("保存位置: %s", os.path.abspath(self.output_dir))
         logger.info("=" * 60)
         
         return {
@@ -309,7 +603,7 @@ def main():
     downloader = AnnualReportDownloader(output_dir="annual_reports")
     
     # 下载推荐基金的年报
-    result = downloader.download_recommended_funds(years=[2022, 2023, 2024])
+    result = downloader.download_recommended_funds(years=DEFAULT_YEARS)
     
     print("")
     print("下载结果:")
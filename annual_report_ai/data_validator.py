@@ -6,13 +6,111 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional
 import logging
+import multiprocessing
+import os
 import re
+import sys
+import unicodedata
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import repeat
+from functools import lru_cache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 视为空值的单元格文本
+BLANK_CELL_TEXTS = frozenset({'', 'None', 'nan', '-'})
+
+# 解析数字时移除的千分位逗号和空格
+NUMBER_STRIP_TABLE = str.maketrans('', '', ', ')
+
+# 负数标记（负号、括号）
+NEGATIVE_SIGN_TABLE = str.maketrans('', '', '-()')
+
+# 数字部分
+NUMBER_PATTERN = re.compile(r'[\d.]+')
+
+# 差异严重程度阈值：差异率>1% 或 差异>1000元为高，差异率>0.1% 或 差异>100元为中
+HIGH_SEVERITY_RATE = 0.01
+HIGH_SEVERITY_AMOUNT = 1000
+MEDIUM_SEVERITY_RATE = 0.001
+MEDIUM_SEVERITY_AMOUNT = 100
+
+# 主表类型及其相关附注表的名称关键词（主表类型按此顺序判定）
+NOTE_CATEGORY_KEYWORDS = {
+    '资产负债表': ('资产', '负债'),
+    '利润表': ('收入', '费用', '损益')
+}
+
+# 并行验证多份年报的最大线程数（或启用多进程时的最大进程数）
+MAX_VALIDATION_WORKERS = min(4, os.cpu_count() or 1)
+
+# 浮点数转文本时不使用科学计数法的绝对值范围 [下限, 上限)
+SCIENTIFIC_TEXT_LOWER = 1e-4
+SCIENTIFIC_TEXT_UPPER = 1e16
+
+# 拼接附注项目时使用的分隔符（同义词含有该字符时退回逐项匹配）
+NOTE_ITEM_SEPARATOR = '\x00'
+
+# 匹配项目名称时忽略的空白（PDF 提取的单元格常夹带空格和换行；全角空格经 NFKC 转为半角）
+ITEM_NAME_IGNORED_CHARS = str.maketrans('', '', ' \t\r\n')
+
+# 去除空白后仅由数字和数值符号组成的单元格视为金额，保留原文参与匹配
+NUMERIC_ITEM_PATTERN = re.compile(r'[-+()\d,.%]+')
+
+
+def _intern_rules(rules: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """驻留规则中的项目名称，与同样驻留的表格项目比较、查字典时可按对象身份直接命中"""
+    return {
+        sys.intern(item): [sys.intern(name) for name in names]
+        for item, names in rules.items()
+    }
+
+
+def _canonical_item(name: str) -> str:
+    """项目名称的规范形式：全角字符转为半角并去除空白，规范化后为空或为数值时保留原文"""
+    key = unicodedata.normalize('NFKC', name).translate(ITEM_NAME_IGNORED_CHARS)
+    if not key or NUMERIC_ITEM_PATTERN.fullmatch(key):
+        return name
+    return key
+
+
+@lru_cache(maxsize=1024)
+def _canonical_synonyms(synonyms: Tuple[str, ...]) -> Tuple[str, ...]:
+    """同义词组的规范形式（按同义词组缓存）"""
+    return tuple(_canonical_item(synonym) for synonym in synonyms)
+
+
+@lru_cache(maxsize=1024)
+def _synonym_pattern(synonyms: Tuple[str, ...]) -> re.Pattern:
+    """编译同义词的多模式匹配正则（按同义词组缓存）"""
+    return re.compile('|'.join(re.escape(synonym) for synonym in synonyms))
+
+
+@lru_cache(maxsize=1024)
+def _synonym_substrings(synonyms: Tuple[str, ...]) -> frozenset:
+    """同义词组的全部子串（含空串）"""
+    return frozenset(
+        synonym[begin:end]
+        for synonym in synonyms
+        for begin in range(len(synonym) + 1)
+        for end in range(begin, len(synonym) + 1)
+    )
+
+
+@dataclass(slots=True)
+class PreparedTable:
+    """预处理后的表格：项目名称列、项目索引和第2~4列的 float64 数值矩阵"""
+    items: List[str]
+    item_index: Dict[str, List[int]]
+    values: np.ndarray
+    extracted: Dict[str, Optional[float]] = field(default_factory=dict)
+
 
 class DataValidator:
     """数据验证器"""
@@ -42,14 +140,15 @@ class DataValidator:
             差异列表
         """
         differences = []
+        value_cache = {}
         
         for main_item, note_item in mapping.items():
             try:
                 # 从主表提取值
-                main_value = self._extract_value(main_table, main_item)
+                main_value = self._cached_value(value_cache, main_table, main_item)
                 
                 # 从附注提取值
-                note_value = self._extract_value(note_table, note_item)
+                note_value = self._cached_value(value_cache, note_table, note_item)
                 
                 if main_value is not None and note_value is not None:
                     # 计算差异
@@ -88,95 +187,166 @@ class DataValidator:
         返回:
             差异列表
         """
-        differences = []
-        
+        return list(self._iter_cross_year_differences(current_report, previous_report, items))
+    
+    def _iter_cross_year_differences(self, current_report: Dict,
+                                     previous_report: Dict,
+                                     items: List[str]) -> Iterator[Dict]:
+        """逐条生成跨年度差异（供调用方直接 extend，不构造中间列表）"""
         current_year = current_report.get('year')
         previous_year = previous_report.get('year')
         
         logger.info(f"跨年度对比: {current_year}年报中的{previous_year}数据 vs {previous_year}年报数据")
         
-        for item in items:
-            try:
-                # 从当前年报中提取上一年的数据
-                current_last_year_value = self._extract_last_year_value(
-                    current_report, item
-                )
-                
-                # 从上一年年报中提取数据
-                previous_year_value = self._extract_current_year_value(
-                    previous_report, item
-                )
-                
-                if current_last_year_value is not None and previous_year_value is not None:
-                    # 跨年数据必须完全一致
-                    if current_last_year_value != previous_year_value:
-                        diff = abs(current_last_year_value - previous_year_value)
-                        
-                        differences.append({
-                            'type': '跨年不一致',
-                            'item': item,
-                            'current_report_last_year': current_last_year_value,
-                            'previous_report': previous_year_value,
-                            'difference': diff,
-                            'difference_rate': (diff / previous_year_value * 100) if previous_year_value != 0 else 0,
-                            'severity': 'High'  # 跨年不一致都是高优先级
-                        })
-                        
-                        logger.warning(f"跨年不一致: {item}, 差异={diff:.2f}")
-            
-            except Exception as e:
-                logger.error(f"跨年对比 {item} 失败: {str(e)}")
+        current_values, previous_values = self.extract_cross_year_values(
+            current_report, previous_report, items
+        )
+        yield from self._iter_value_differences(items, current_values, previous_values)
+    
+    def extract_cross_year_values(self, current_report: Dict,
+                                  previous_report: Dict,
+                                  items: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        批量提取跨年度对比数值
         
-        return differences
+        每张表的项目列和目标列只定位一次，项目按列向量化匹配，
+        不再逐项目用 iterrows 遍历所有行。
+        
+        参数:
+            current_report: 当前年报数据
+            previous_report: 上一年年报数据
+            items: 需要对比的项目列表
+        
+        返回:
+            (当前年报中的上年数据, 上一年年报数据)，缺失值为 NaN
+        """
+        last_year_columns = self._locate_item_columns(current_report, ['上年', '上期'])
+        current_year_columns = self._locate_item_columns(previous_report, ['本期', '期末', '本年'])
+        
+        current_values = np.array(
+            [self._lookup_item_value(last_year_columns, item) for item in items], dtype=float
+        )
+        previous_values = np.array(
+            [self._lookup_item_value(current_year_columns, item) for item in items], dtype=float
+        )
+        return current_values, previous_values
+    
+    def compare_cross_year_values(self, items: List[str],
+                                  current_values: np.ndarray,
+                                  previous_values: np.ndarray) -> List[Dict]:
+        """
+        根据批量提取的数值生成跨年度差异列表
+        
+        参数:
+            items: 项目列表
+            current_values: 当前年报中的上年数据（缺失为 NaN）
+            previous_values: 上一年年报数据（缺失为 NaN）
+        
+        返回:
+            差异列表
+        """
+        return list(self._iter_value_differences(items, current_values, previous_values))
+    
+    def _iter_value_differences(self, items: List[str],
+                                current_values: np.ndarray,
+                                previous_values: np.ndarray) -> Iterator[Dict]:
+        """逐条生成跨年度数值差异"""
+        found = ~(np.isnan(current_values) | np.isnan(previous_values))
+        diffs = np.abs(current_values - previous_values)
+        rates = np.divide(diffs, previous_values, out=np.zeros_like(diffs),
+                          where=found & (previous_values != 0)) * 100
+        
+        # 跨年数据必须完全一致
+        for i in np.flatnonzero(found & (current_values != previous_values)):
+            yield {
+                'type': '跨年不一致',
+                'item': items[i],
+                'current_report_last_year': float(current_values[i]),
+                'previous_report': float(previous_values[i]),
+                'difference': float(diffs[i]),
+                'difference_rate': float(rates[i]),
+                'severity': 'High'  # 跨年不一致都是高优先级
+            }
+            
+            logger.warning(f"跨年不一致: {items[i]}, 差异={diffs[i]:.2f}")
     
     def validate_summation(self, table: pd.DataFrame, 
-                          summation_rules: Dict[str, List[str]]) -> List[Dict]:
+                          summation_rules: Dict[str, List[str]],
+                          value_cache: Optional[Dict] = None) -> List[Dict]:
         """
         验证加总关系
         
         参数:
             table: 数据表
             summation_rules: 加总规则 {总计项: [小项列表]}
+            value_cache: 项目取值缓存，同一份年报内可共用（可选）
         
         返回:
             差异列表
         """
-        differences = []
-        
-        for total_item, sub_items in summation_rules.items():
+        return list(self._iter_summation_differences(table, summation_rules, value_cache))
+    
+    def _iter_summation_differences(self, table: pd.DataFrame,
+                                    summation_rules: Dict[str, List[str]],
+                                    value_cache: Optional[Dict] = None) -> Iterator[Dict]:
+        """逐条生成加总差异（供调用方直接 extend，不构造中间列表）"""
+        if value_cache is None:
+            value_cache = {}
+        
+        rules = list(summation_rules.items())
+        if not rules:
+            return
+        
+        # 总计值向量和小项取值矩阵（每行一条规则）；缺失的小项和补齐位置取 0，不影响累加结果
+        width = max(len(sub_items) for _, sub_items in rules)
+        total_values = np.full(len(rules), np.nan)
+        sub_matrix = np.zeros((len(rules), width))
+        has_sub_values = np.zeros(len(rules), dtype=bool)
+        
+        for rule_idx, (total_item, sub_items) in enumerate(rules):
             try:
                 # 提取总计值
-                total_value = self._extract_value(table, total_item)
+                total_value = self._cached_value(value_cache, table, total_item)
+                if total_value is None:
+                    continue
                 
-                # 提取并累加小项
-                sub_values = []
-                for sub_item in sub_items:
-                    value = self._extract_value(table, sub_item)
+                # 提取小项
+                for col_idx, sub_item in enumerate(sub_items):
+                    value = self._cached_value(value_cache, table, sub_item)
                     if value is not None:
-                        sub_values.append(value)
+                        sub_matrix[rule_idx, col_idx] = value
+                        has_sub_values[rule_idx] = True
                 
-                if total_value is not None and sub_values:
-                    calculated_total = sum(sub_values)
-                    diff = abs(total_value - calculated_total)
-                    
-                    if diff > self.tolerance:
-                        differences.append({
-                            'type': '加总错误',
-                            'total_item': total_item,
-                            'sub_items': sub_items,
-                            'reported_total': total_value,
-                            'calculated_total': calculated_total,
-                            'difference': diff,
-                            'difference_rate': (diff / total_value * 100) if total_value != 0 else 0,
-                            'severity': self._assess_severity(diff, total_value)
-                        })
-                        
-                        logger.warning(f"加总错误: {total_item}, 差异={diff:.2f}")
+                total_values[rule_idx] = total_value
             
             except Exception as e:
                 logger.error(f"加总验证 {total_item} 失败: {str(e)}")
         
-        return differences
+        # 所有规则一起按列累加（累加顺序与逐项 sum 相同，结果完全一致）
+        calculated_totals = np.zeros(len(rules))
+        with np.errstate(over='ignore', invalid='ignore'):
+            for column in sub_matrix.T:
+                calculated_totals += column
+            diffs = np.abs(total_values - calculated_totals)
+        
+        checked = has_sub_values & ~np.isnan(total_values)
+        for rule_idx in np.flatnonzero(checked & (diffs > self.tolerance)):
+            total_item, sub_items = rules[rule_idx]
+            total_value = float(total_values[rule_idx])
+            diff = float(diffs[rule_idx])
+            
+            yield {
+                'type': '加总错误',
+                'total_item': total_item,
+                'sub_items': sub_items,
+                'reported_total': total_value,
+                'calculated_total': float(calculated_totals[rule_idx]),
+                'difference': diff,
+                'difference_rate': (diff / total_value * 100) if total_value != 0 else 0,
+                'severity': self._assess_severity(diff, total_value)
+            }
+            
+            logger.warning(f"加总错误: {total_item}, 差异={diff:.2f}")
     
     def _extract_value(self, table: pd.DataFrame, item_name: str) -> Optional[float]:
         """
@@ -192,20 +362,107 @@ class DataValidator:
         if table is None or table.empty:
             return None
         
-        # 在第一列查找项目名称
-        for idx, row in table.iterrows():
-            first_col = str(row.iloc[0]) if len(row) > 0 else ''
-            
-            if item_name in first_col:
-                # 尝试从第二列或第三列提取数值
-                for col_idx in range(1, min(len(row), 4)):
-                    value_str = str(row.iloc[col_idx])
-                    value = self._parse_number(value_str)
-                    if value is not None:
-                        return value
+        # 在第一列查找项目名称（整列向量化匹配）
+        n_cols = min(table.shape[1], 4)
+        for row_idx in self._match_item_rows(table, item_name):
+            # 尝试从第二列或第三列提取数值
+            for col_idx in range(1, n_cols):
+                value = self._parse_number(str(table.iat[row_idx, col_idx]))
+                if value is not None:
+                    return value
         
         return None
     
+    def _prepare_table(self, table: pd.DataFrame) -> PreparedTable:
+        """将表格预处理为项目索引和 float64 数值矩阵"""
+        items = self._first_column(table)
+        return PreparedTable(
+            items=items,
+            item_index=self._index_table(items),
+            values=self._parse_value_columns(table)
+        )
+    
+    def _prepared(self, value_cache: Dict[int, PreparedTable], table: pd.DataFrame) -> PreparedTable:
+        """
+        获取表格的预处理结果，首次访问时建立
+        
+        缓存按 id(table) 记录，由调用方按年报创建，调用期间表格对象一直存活，id 不会被复用。
+        第一列只转换一次字符串、数值列只解析一次，供勾稽、取值和加总识别共用。
+        """
+        prepared = value_cache.get(id(table))
+        if prepared is None:
+            prepared = value_cache[id(table)] = self._prepare_table(table)
+        return prepared
+    
+    def _cached_value(self, value_cache: Dict[int, PreparedTable],
+                      table: pd.DataFrame, item_name: str) -> Optional[float]:
+        """带缓存的 _extract_value"""
+        prepared = self._prepared(value_cache, table)
+        if item_name not in prepared.extracted:
+            prepared.extracted[item_name] = self._first_parsed_value(
+                prepared.values, self._lookup_item_rows(prepared.item_index, item_name)
+            )
+        return prepared.extracted[item_name]
+    
+    def _first_column(self, table: pd.DataFrame) -> List[str]:
+        """表格第一列（项目名称列）转为驻留的字符串列表，空表返回空列表"""
+        if table is None or table.empty:
+            return []
+        return list(map(sys.intern, table.iloc[:, 0].astype(str).tolist()))
+    
+    def _index_table(self, items: List[str]) -> Dict[str, List[int]]:
+        """
+        建立表格第一列的项目索引 {项目名称: [行位置]}
+        
+        重复的项目名称只保留一个键，查找时只需遍历去重后的名称。
+        """
+        table_index = {}
+        for row_idx, name in enumerate(items):
+            table_index.setdefault(name, []).append(row_idx)
+        return table_index
+    
+    def _parse_value_columns(self, table: pd.DataFrame) -> np.ndarray:
+        """
+        一次性解析 _extract_value 会读取的第2~4列
+        
+        返回:
+            形状为 (行数, 列数) 的 float64 矩阵，无法解析的单元格为 NaN
+        """
+        if table is None or table.empty:
+            return np.empty((0, 0))
+        
+        n_cols = min(table.shape[1], 4)
+        columns = [self._parse_column(table.iloc[:, col_idx]) for col_idx in range(1, n_cols)]
+        if not columns:
+            return np.empty((len(table), 0))
+        return np.column_stack(columns)
+    
+    def _first_parsed_value(self, parsed: np.ndarray, rows: List[int]) -> Optional[float]:
+        """按行、列顺序返回匹配行中第一个可解析的数值"""
+        if len(rows) == 0 or parsed.shape[1] == 0:
+            return None
+        
+        candidates = parsed[rows].ravel()
+        found = np.flatnonzero(~np.isnan(candidates))
+        return float(candidates[found[0]]) if len(found) > 0 else None
+    
+    def _lookup_item_rows(self, table_index: Dict[str, List[int]], item_name: str) -> List[int]:
+        """在项目索引中查找包含项目名称的行位置（按行顺序）"""
+        rows = table_index.get(item_name, [])
+        # 名称完全相同的项目之外，还要保留包含该名称的其他行
+        partial = [row_idx
+                   for name, positions in table_index.items()
+                   if name != item_name and item_name in name
+                   for row_idx in positions]
+        if partial:
+            rows = sorted(rows + partial)
+        return rows
+    
+    def _match_item_rows(self, table: pd.DataFrame, item_name: str) -> np.ndarray:
+        """返回第一列包含项目名称的行位置"""
+        names = table.iloc[:, 0].astype(str)
+        return np.flatnonzero(names.str.contains(item_name, regex=False).to_numpy())
+    
     def _extract_last_year_value(self, report: Dict, item_name: str) -> Optional[float]:
         """从当前年报中提取上一年的数据"""
         # 通常在表格的"上年同期"或"上年末"列
@@ -231,6 +488,36 @@ class DataValidator:
         
         return None
     
+    def _locate_item_columns(self, report: Dict,
+                             column_keywords: List[str]) -> List[Tuple[pd.Series, pd.Series]]:
+        """定位年报各主表的项目名称列和包含关键词的数值列"""
+        located = []
+        
+        for table_name, table in report.get('tables', {}).items():
+            if '资产负债表' not in table_name and '利润表' not in table_name:
+                continue
+            if table is None or table.empty:
+                continue
+            
+            for col_idx, col in enumerate(table.columns):
+                if any(keyword in str(col) for keyword in column_keywords):
+                    located.append((table.iloc[:, 0].astype(str), table.iloc[:, col_idx]))
+                    break
+        
+        return located
+    
+    def _lookup_item_value(self, located: List[Tuple[pd.Series, pd.Series]],
+                           item_name: str) -> float:
+        """在已定位的列中查找项目数值（取第一个匹配行），未找到返回 NaN"""
+        for names, values in located:
+            matches = np.flatnonzero(names.str.contains(item_name, regex=False).to_numpy())
+            if len(matches) > 0:
+                value = self._parse_number(str(values.iat[matches[0]]))
+                if value is not None:
+                    return value
+        
+        return np.nan
+    
     def _extract_value_from_column(self, table: pd.DataFrame, 
                                    item_name: str, 
                                    column_keywords: List[str]) -> Optional[float]:
@@ -239,23 +526,20 @@ class DataValidator:
             return None
         
         # 查找包含关键词的列
-        target_col = None
-        for col in table.columns:
+        target_idx = None
+        for col_idx, col in enumerate(table.columns):
             col_str = str(col)
             if any(keyword in col_str for keyword in column_keywords):
-                target_col = col
+                target_idx = col_idx
                 break
         
-        if target_col is None:
+        if target_idx is None:
             return None
         
-        # 在第一列查找项目名称
-        for idx, row in table.iterrows():
-            first_col = str(row.iloc[0]) if len(row) > 0 else ''
-            
-            if item_name in first_col:
-                value_str = str(row[target_col])
-                return self._parse_number(value_str)
+        # 在第一列查找项目名称，取第一个匹配行
+        matches = self._match_item_rows(table, item_name)
+        if len(matches) > 0:
+            return self._parse_number(str(table.iat[matches[0], target_idx]))
         
         return None
     
@@ -269,21 +553,20 @@ class DataValidator:
         返回:
             浮点数或None
         """
-        if not value_str or value_str in ['', 'None', 'nan', '-']:
+        if not value_str or value_str in BLANK_CELL_TEXTS:
             return None
         
         try:
             # 移除逗号和空格
-            value_str = value_str.replace(',', '').replace(' ', '').strip()
+            value_str = value_str.translate(NUMBER_STRIP_TABLE).strip()
             
             # 处理负数
-            is_negative = False
-            if value_str.startswith('-') or value_str.startswith('('):
-                is_negative = True
-                value_str = value_str.replace('-', '').replace('(', '').replace(')', '')
+            is_negative = value_str.startswith(('-', '('))
+            if is_negative:
+                value_str = value_str.translate(NEGATIVE_SIGN_TABLE)
             
             # 提取数字
-            match = re.search(r'[\d.]+', value_str)
+            match = NUMBER_PATTERN.search(value_str)
             if match:
                 value = float(match.group())
                 return -value if is_negative else value
@@ -293,6 +576,40 @@ class DataValidator:
         
         return None
     
+    def _parse_column(self, series: pd.Series) -> np.ndarray:
+        """
+        批量解析一整列数字字符串
+        
+        已是数值类型的列直接整列转换为 float64，只有转成文本后会写成科学计数法
+        或 nan/inf 的单元格才逐个解析，结果与逐个 _parse_number 一致。
+        
+        参数:
+            series: 单元格列
+        
+        返回:
+            float64 数组，无法解析的单元格为 NaN
+        """
+        dtype = series.dtype
+        if isinstance(dtype, np.dtype) and dtype.kind in 'iu':
+            return series.to_numpy(dtype=float)
+        
+        if isinstance(dtype, np.dtype) and dtype == np.float64:
+            values = series.to_numpy(dtype=float, copy=True)
+            magnitude = np.abs(values)
+            as_text = ~((magnitude == 0) | ((magnitude >= SCIENTIFIC_TEXT_LOWER) & (magnitude < SCIENTIFIC_TEXT_UPPER)))
+            if as_text.any():
+                values[as_text] = self._parse_texts(series[as_text].astype(str).tolist())
+            return values
+        
+        return self._parse_texts(series.astype(str).tolist())
+    
+    def _parse_texts(self, texts: List[str]) -> np.ndarray:
+        """逐个解析文本，返回 float64 数组（无法解析为 NaN）"""
+        return np.array(
+            [np.nan if value is None else value for value in map(self._parse_number, texts)],
+            dtype=float
+        )
+    
     def _assess_severity(self, diff: float, base_value: float) -> str:
         """
         评估差异严重程度
@@ -305,13 +622,17 @@ class DataValidator:
             严重程度 (High/Medium/Low)
         """
         if base_value == 0:
-            return 'High' if diff > 100 else 'Medium'
+            return 'High' if diff > MEDIUM_SEVERITY_AMOUNT else 'Medium'
+        
+        # 先比较金额，超过阈值时无需再计算差异率
+        if diff > HIGH_SEVERITY_AMOUNT:
+            return 'High'
         
         rate = abs(diff / base_value)
         
-        if rate > 0.01 or diff > 1000:  # 差异率>1% 或 差异>1000元
+        if rate > HIGH_SEVERITY_RATE:
             return 'High'
-        elif rate > 0.001 or diff > 100:  # 差异率>0.1% 或 差异>100元
+        elif rate > MEDIUM_SEVERITY_RATE or diff > MEDIUM_SEVERITY_AMOUNT:
             return 'Medium'
         else:
             return 'Low'
@@ -329,46 +650,44 @@ class DataValidator:
         differences = []
         tables = report.get('tables', {})
         
-        # 分离主表和附注表
-        main_tables = {}
-        note_tables = {}
+        # 分离主表和附注表，并按主表类型一次性归类
+        main_tables = []
+        notes_by_category = {category: [] for category in NOTE_CATEGORY_KEYWORDS}
+        note_count = 0
         
         for table_name, table_df in tables.items():
             if '主表' in table_name:
-                main_tables[table_name] = table_df
+                # 主表类型按 NOTE_CATEGORY_KEYWORDS 的顺序取第一个匹配
+                category = next((c for c in NOTE_CATEGORY_KEYWORDS if c in table_name), None)
+                main_tables.append((table_name, table_df, category))
             elif '附注' in table_name or '明细' in table_name:
-                note_tables[table_name] = table_df
-        
-        logger.info(f"找到 {len(main_tables)} 个主表, {len(note_tables)} 个附注表")
-        
-        # 对每个主表，尝试找到对应的附注表进行勾稽
-        for main_table_name, main_table in main_tables.items():
-            # 确定主表类型
-            if '资产负债表' in main_table_name:
-                # 查找资产负债表相关的附注
-                for note_table_name, note_table in note_tables.items():
-                    if '资产' in note_table_name or '负债' in note_table_name:
-                        # 执行勾稽验证
-                        diffs = self._reconcile_tables(
-                            main_table, note_table,
-                            main_table_name, note_table_name
-                        )
-                        differences.extend(diffs)
+                note_count += 1
+                # 一张附注表可能同时与两类主表相关
+                for category, keywords in NOTE_CATEGORY_KEYWORDS.items():
+                    if any(keyword in table_name for keyword in keywords):
+                        notes_by_category[category].append((table_name, table_df))
+        
+        logger.info(f"找到 {len(main_tables)} 个主表, {note_count} 个附注表")
+        
+        # 同一主表会与多个附注表勾稽，取值结果在本份年报内共用
+        value_cache = {}
+        
+        # 对每个主表，只与同类型的附注表进行勾稽
+        for main_table_name, main_table, category in main_tables:
+            if category is None:
+                continue
             
-            elif '利润表' in main_table_name:
-                # 查找利润表相关的附注
-                for note_table_name, note_table in note_tables.items():
-                    if '收入' in note_table_name or '费用' in note_table_name or '损益' in note_table_name:
-                        diffs = self._reconcile_tables(
-                            main_table, note_table,
-                            main_table_name, note_table_name
-                        )
-                        differences.extend(diffs)
+            for note_table_name, note_table in notes_by_category[category]:
+                differences.extend(self._reconcile_tables(
+                    main_table, note_table,
+                    main_table_name, note_table_name, value_cache
+                ))
         
         return differences
     
     def _reconcile_tables(self, main_table: pd.DataFrame, note_table: pd.DataFrame,
-                         main_name: str, note_name: str) -> List[Dict]:
+                         main_name: str, note_name: str,
+                         value_cache: Optional[Dict] = None) -> Iterator[Dict]:
         """
         勾稽两个表格
         
@@ -377,18 +696,21 @@ class DataValidator:
             note_table: 附注表
             main_name: 主表名称
             note_name: 附注表名称
+            value_cache: 项目取值缓存（可选）
         
         返回:
-            差异列表
+            逐条生成的差异
         """
-        differences = []
+        if value_cache is None:
+            value_cache = {}
         
         # 获取主表的所有项目
         if main_table is None or main_table.empty:
-            return differences
+            return
         
-        main_items = main_table.iloc[:, 0].astype(str).tolist()
-        note_items = note_table.iloc[:, 0].astype(str).tolist() if note_table is not None and not note_table.empty else []
+        main_items = self._prepared(value_cache, main_table).items
+        note_items = self._prepared(value_cache, note_table).items
+        note_index = ReconciliationRules.index_note_items(note_items)
         
         # 对每个主表项目，尝试在附注中找到匹配项
         for main_item in main_items:
@@ -396,20 +718,20 @@ class DataValidator:
                 continue
             
             # 查找匹配的附注项目
-            matching_note_items = ReconciliationRules.find_matching_items(main_item, note_items)
+            matching_note_items = ReconciliationRules.find_matching_items(main_item, note_items, note_index)
             
             if matching_note_items:
                 # 提取并对比数值
-                main_value = self._extract_value(main_table, main_item)
+                main_value = self._cached_value(value_cache, main_table, main_item)
                 
                 for note_item in matching_note_items:
-                    note_value = self._extract_value(note_table, note_item)
+                    note_value = self._cached_value(value_cache, note_table, note_item)
                     
                     if main_value is not None and note_value is not None:
                         diff = abs(main_value - note_value)
                         
                         if diff > self.tolerance:
-                            differences.append({
+                            yield {
                                 'type': '勾稽差异',
                                 'main_table': main_name,
                                 'note_table': note_name,
@@ -420,11 +742,9 @@ class DataValidator:
                                 'difference': diff,
                                 'difference_rate': (diff / main_value * 100) if main_value != 0 else 0,
                                 'severity': self._assess_severity(diff, main_value)
-                            })
+                            }
                             
                             logger.info(f"勾稽差异: {main_item} vs {note_item}, 差异={diff:.2f}")
-        
-        return differences
     
     def auto_validate_summation(self, report: Dict) -> List[Dict]:
         """
@@ -438,33 +758,35 @@ class DataValidator:
         """
         all_differences = []
         tables = report.get('tables', {})
+        value_cache = {}
         
         for table_name, table_df in tables.items():
             logger.info(f"分析表格 {table_name} 的加总关系...")
             
             # 自动识别加总关系
-            summation_relationships = ReconciliationRules.identify_summation_relationships(table_df)
+            summation_relationships = ReconciliationRules.identify_summation_relationships(
+                table_df, self._prepared(value_cache, table_df).items
+            )
             
             if summation_relationships:
                 logger.info(f"发现 {len(summation_relationships)} 个加总关系")
                 
-                # 验证每个加总关系
-                differences = self.validate_summation(table_df, summation_relationships)
-                
-                # 添加表格名称信息
-                for diff in differences:
+                # 验证每个加总关系，并添加表格名称信息
+                for diff in self._iter_summation_differences(table_df, summation_relationships, value_cache):
                     diff['table_name'] = table_name
-                
-                all_differences.extend(differences)
+                    all_differences.append(diff)
         
         return all_differences
     
-    def comprehensive_validation(self, reports: Dict[str, Dict]) -> Dict:
+    def comprehensive_validation(self, reports: Dict[str, Dict], use_processes: bool = False) -> Dict:
         """
         综合验证（增强版）
         
         参数:
             reports: 年报数据字典 {年份: 报告数据}
+            use_processes: 是否用多进程并行验证各年报。默认使用线程池；
+                多进程以 spawn 方式启动（避免在多线程进程中 fork），
+                且每份年报需序列化传入子进程，仅适合脚本中的批量验证
         
         返回:
             验证结果汇总
@@ -479,44 +801,50 @@ class DataValidator:
             current_year = sorted_years[i + 1]
             previous_year = sorted_years[i]
             
-            cross_year_diffs = self.validate_cross_year(
+            all_differences.extend(self._iter_cross_year_differences(
                 reports[current_year],
                 reports[previous_year],
                 ReconciliationRules.CROSS_YEAR_ITEMS
-            )
-            all_differences.extend(cross_year_diffs)
+            ))
+        
+        # 2. 每个年报的内部验证（各年报互不依赖，多份年报时并行）
+        if len(reports) > 1 and MAX_VALIDATION_WORKERS > 1:
+            max_workers = min(MAX_VALIDATION_WORKERS, len(reports))
+            if use_processes:
+                executor = ProcessPoolExecutor(
+                    max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            else:
+                executor = ThreadPoolExecutor(max_workers=max_workers)
+            with executor:
+                report_diffs = executor.map(
+                    _validate_one_report,
+                    reports.keys(), reports.values(), repeat(self.tolerance)
+                )
+                for diffs in report_diffs:
+                    all_differences.extend(diffs)
+        else:
+            for year, report in reports.items():
+                all_differences.extend(_validate_one_report(year, report, self.tolerance))
         
-        # 2. 每个年报的内部验证
-        for year, report in reports.items():
-            logger.info(f"验证 {year} 年报内部数据...")
-            
-            # 2.1 智能主表与附注勾稽
-            reconciliation_diffs = self.smart_reconciliation(report)
-            all_differences.extend(reconciliation_diffs)
-            
-            # 2.2 自动加总关系验证
-            summation_diffs = self.auto_validate_summation(report)
-            all_differences.extend(summation_diffs)
+        # 3. 统计结果（一次遍历同时按严重程度和类型计数）
+        severity_counts = Counter()
+        type_counts = Counter()
+        for diff in all_differences:
+            severity_counts[diff.get('severity')] += 1
+            type_counts[diff.get('type', 'Unknown')] += 1
         
-        # 3. 统计结果
         result = {
             'total_differences': len(all_differences),
             'by_severity': {
-                'High': len([d for d in all_differences if d.get('severity') == 'High']),
-                'Medium': len([d for d in all_differences if d.get('severity') == 'Medium']),
-                'Low': len([d for d in all_differences if d.get('severity') == 'Low'])
+                'High': severity_counts['High'],
+                'Medium': severity_counts['Medium'],
+                'Low': severity_counts['Low']
             },
-            'by_type': {},
+            'by_type': dict(type_counts),
             'differences': all_differences
         }
         
-        # 按类型统计
-        for diff in all_differences:
-            diff_type = diff.get('type', 'Unknown')
-            if diff_type not in result['by_type']:
-                result['by_type'][diff_type] = 0
-            result['by_type'][diff_type] += 1
-        
         logger.info(f"验证完成: 发现 {len(all_differences)} 处差异")
         logger.info(f"  - 勾稽差异: {result['by_type'].get('勾稽差异', 0)}个")
         logger.info(f"  - 跨年不一致: {result['by_type'].get('跨年不一致', 0)}个")
@@ -525,11 +853,42 @@ class DataValidator:
         return result
 
 
+@lru_cache(maxsize=64)
+def _cached_note_index(note_items: Tuple[str, ...]) -> Dict:
+    """未传入索引时按附注项目列表缓存 index_note_items 的结果"""
+    return ReconciliationRules.index_note_items(list(note_items))
+
+
+def _validate_one_report(year, report: Dict, tolerance: float) -> List[Dict]:
+    """
+    验证单份年报的内部数据
+    
+    定义在模块级，启用多进程验证时可由 ProcessPoolExecutor 在子进程中调用。
+    
+    参数:
+        year: 年份
+        report: 年报数据
+        tolerance: 允许的差异容忍度（元）
+    
+    返回:
+        差异列表
+    """
+    logger.info(f"验证 {year} 年报内部数据...")
+    validator = DataValidator(tolerance=tolerance)
+    
+    # 智能主表与附注勾稽
+    differences = validator.smart_reconciliation(report)
+    
+    # 自动加总关系验证
+    differences.extend(validator.auto_validate_summation(report))
+    return differences
+
+
 class ReconciliationRules:
     """勾稽规则库（增强版）"""
     
     # 资产负债表勾稽规则
-    BALANCE_SHEET_RULES = {
+    BALANCE_SHEET_RULES = _intern_rules({
         '资产总计': ['资产合计', '资产总额', '总资产'],
         '负债总计': ['负债合计', '负债总额', '总负债'],
         '净资产': ['所有者权益', '基金净资产', '净资产合计'],
@@ -540,19 +899,19 @@ class ReconciliationRules:
         '应收款项': ['应收账款', '应收票据', '应收款项合计'],
         '流动负债': ['流动负债合计', '流动负债总计'],
         '应付款项': ['应付账款', '应付票据', '应付款项合计']
-    }
+    })
     
     # 利润表勾稽规则
-    INCOME_STATEMENT_RULES = {
+    INCOME_STATEMENT_RULES = _intern_rules({
         '营业收入': ['收入合计', '营业收入合计', '总收入'],
         '营业成本': ['成本合计', '营业成本合计', '总成本'],
         '净利润': ['本期利润', '净利润合计', '利润总额'],
         '投资收益': ['投资收益合计', '投资收益总额'],
         '公允价值变动收益': ['公允价值变动损益', '公允价值变动收益合计']
-    }
+    })
     
     # 加总规则（自动识别）
-    SUMMATION_RULES = {
+    SUMMATION_RULES = _intern_rules({
         '资产总计': ['流动资产', '非流动资产'],
         '流动资产': ['货币资金', '交易性金融资产', '应收款项', '预付款项', '存出保证金', '其他流动资产'],
         '非流动资产': ['长期股权投资', '固定资产', '无形资产', '递延所得税资产', '其他非流动资产'],
@@ -561,10 +920,14 @@ class ReconciliationRules:
         '非流动负债': ['长期借款', '应付债券', '递延所得税负债', '其他非流动负债'],
         '营业收入': ['利息收入', '投资收益', '公允价值变动收益', '其他收入'],
         '营业成本': ['利息支出', '业务及管理费', '其他费用']
-    }
+    })
+    
+    # 总计行关键词（"小计"只标记总计行，不截断上方的小项）
+    TOTAL_PATTERN = re.compile('合计|总计|总额|小计')
+    SECTION_END_PATTERN = re.compile('合计|总计|总额')
     
     # 跨年对比项目
-    CROSS_YEAR_ITEMS = [
+    CROSS_YEAR_ITEMS = list(map(sys.intern, [
         '资产总计',
         '负债总计',
         '净资产',
@@ -573,22 +936,56 @@ class ReconciliationRules:
         '净利润',
         '基金份额总额',
         '基金份额净值'
-    ]
+    ]))
+    
+    @staticmethod
+    def index_note_items(note_items: List[str]) -> Dict:
+        """
+        预处理附注项目列表，供 find_matching_items 在同一附注表上反复查找
+        
+        项目名称先转为规范形式（见 _canonical_item），再以分隔符拼接成一段文本，
+        "同义词包含于附注项目"可直接在整段文本中查找；另按规范形式建立位置索引，
+        用于"附注项目包含于同义词"的子串查表。
+        
+        参数:
+            note_items: 附注项目列表
+        
+        返回:
+            附注项目索引
+        """
+        keys = [_canonical_item(note_item) for note_item in note_items]
+        starts = []
+        positions = {}
+        offset = 0
+        for idx, key in enumerate(keys):
+            starts.append(offset)
+            offset += len(key) + 1
+            positions.setdefault(key, []).append(idx)
+        
+        return {
+            'items': note_items,
+            'text': NOTE_ITEM_SEPARATOR.join(keys),
+            'starts': starts,
+            'positions': positions,
+            'names': frozenset(positions)
+        }
     
     @staticmethod
-    def find_matching_items(main_item: str, note_items: List[str]) -> List[str]:
+    def find_matching_items(main_item: str, note_items: List[str],
+                            note_index: Optional[Dict] = None) -> List[str]:
         """
         在附注项目中查找与主表项目匹配的项目
         
+        同义词与附注项目均按规范形式比较，忽略空白和全角/半角差异。
+        
         参数:
             main_item: 主表项目名称
             note_items: 附注项目列表
+            note_index: index_note_items 生成的索引（可选，同一附注表多次查找时传入以免重复建立）
         
         返回:
             匹配的附注项目列表
         """
-        matches = []
-        
         # 获取主表项目的同义词
         synonyms = ReconciliationRules.BALANCE_SHEET_RULES.get(main_item, [])
         if not synonyms:
@@ -598,22 +995,50 @@ class ReconciliationRules:
         if not synonyms:
             synonyms = [main_item]
         
-        # 在附注项目中查找匹配
-        for note_item in note_items:
-            for synonym in synonyms:
-                if synonym in note_item or note_item in synonym:
-                    matches.append(note_item)
-                    break
+        if not note_items:
+            return []
+        
+        synonym_keys = _canonical_synonyms(tuple(synonyms))
+        
+        if any(NOTE_ITEM_SEPARATOR in key for key in synonym_keys):
+            # 同义词含分隔符时无法在拼接文本中查找，逐项匹配
+            matches = []
+            for note_item in note_items:
+                note_key = _canonical_item(note_item)
+                for key in synonym_keys:
+                    if key in note_key or note_key in key:
+                        matches.append(note_item)
+                        break
+            return matches
+        
+        if note_index is None:
+            note_index = _cached_note_index(tuple(note_items))
+        
+        text = note_index['text']
+        starts = note_index['starts']
+        matched = set()
+        
+        # 同义词包含于附注项目：一次扫描整段拼接文本（匹配不会跨越分隔符）
+        for match in _synonym_pattern(synonym_keys).finditer(text):
+            matched.add(bisect_right(starts, match.start()) - 1)
         
-        return matches
+        # 附注项目包含于同义词：与同义词的全部子串求交集
+        positions = note_index['positions']
+        for key in note_index['names'] & _synonym_substrings(synonym_keys):
+            matched.update(positions[key])
+        
+        items = note_index['items']
+        return [items[idx] for idx in sorted(matched)]
     
     @staticmethod
-    def identify_summation_relationships(table: pd.DataFrame) -> Dict[str, List[str]]:
+    def identify_summation_relationships(table: pd.DataFrame,
+                                         first_col: Optional[List[str]] = None) -> Dict[str, List[str]]:
         """
         自动识别表格中的加总关系
         
         参数:
             table: 数据表
+            first_col: 已转换为字符串的第一列（可选，未提供时从表格读取）
         
         返回:
             加总关系字典 {总计项: [小项列表]}
@@ -627,33 +1052,26 @@ class ReconciliationRules:
         if len(table.columns) == 0:
             return {}
         
-        first_col = table.iloc[:, 0].astype(str).tolist()
+        if first_col is None:
+            first_col = table.iloc[:, 0].astype(str).tolist()
         
-        # 查找包含"合计"、"总计"、"总额"的行
-        total_indices = []
-        for idx, item in enumerate(first_col):
-            if any(keyword in item for keyword in ['合计', '总计', '总额', '小计']):
-                total_indices.append((idx, item))
+        total_search = ReconciliationRules.TOTAL_PATTERN.search
+        section_end_search = ReconciliationRules.SECTION_END_PATTERN.search
         
-        # 对每个总计项，查找其上方的小项
-        for total_idx, total_item in total_indices:
-            sub_items = []
-            
-            # 向上查找，直到遇到另一个总计项或表格开始
-            for i in range(total_idx - 1, -1, -1):
-                item = first_col[i]
-                
-                # 如果遇到另一个总计项，停止
-                if any(keyword in item for keyword in ['合计', '总计', '总额']):
-                    break
-                
-                # 如果是有效的项目名称（不为空且不是纯数字）
-                if item and item.strip() and not item.replace('.', '').replace(',', '').isdigit():
-                    sub_items.append(item)
+        # 自上而下单次扫描：pending 保存自上一个截断总计项以来的有效小项（已是原始顺序）
+        pending = []
+        for item in first_col:
+            # 包含"合计"、"总计"、"总额"、"小计"的行为总计项，上方同一段内的小项即其组成部分
+            is_total = total_search(item) is not None
+            if is_total and pending:
+                relationships[item] = list(pending)
             
-            # 如果找到了小项，记录这个加总关系
-            if sub_items:
-                relationships[total_item] = list(reversed(sub_items))  # 反转以保持原始顺序
+            # "合计"、"总计"、"总额"会截断上方的小项，"小计"不会
+            if is_total and section_end_search(item) is not None:
+                pending = []
+            # 有效的项目名称（不为空且不是纯数字）
+            elif item.strip() and not item.replace('.', '').replace(',', '').isdigit():
+                pending.append(item)
         
         return relationships
 
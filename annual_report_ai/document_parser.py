@@ -30,6 +30,32 @@ class AnnualReportParser:
         参数:
             pdf_path: PDF文件路径
         
+        返回:
+            解析结果字典
+        """
+        return self._parse(pdf_path, pdf_path)
+    
+    def parse_pdf_stream(self, stream, file_name: str) -> Dict:
+        """
+        从内存中的文件对象解析PDF年报
+        
+        参数:
+            stream: 二进制文件对象（如 io.BytesIO）
+            file_name: 原始文件名，用于提取基金名称和年份
+        
+        返回:
+            解析结果字典
+        """
+        return self._parse(stream, file_name)
+    
+    def _parse(self, source, pdf_path: str) -> Dict:
+        """
+        解析PDF年报
+        
+        参数:
+            source: PDF文件路径或二进制文件对象
+            pdf_path: 文件路径或文件名
+        
         返回:
             解析结果字典
         """
@@ -47,7 +73,7 @@ class AnnualReportParser:
         }
         
         try:
-            with pdfplumber.open(pdf_path) as pdf:
+            with pdfplumber.open(source) as pdf:
                 self.pdf = pdf
                 
                 # 提取所有文本
@@ -8,10 +8,17 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple, Optional
 import logging
+import importlib.util
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Excel解析引擎：优先使用calamine（Rust实现，比openpyxl快一个数量级），未安装时使用pandas默认引擎
+EXCEL_ENGINE = 'calamine' if importlib.util.find_spec('python_calamine') else None
+
+# 文本列唯一值占比低于该阈值时转换为category类型
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
 
 class FinancialReconciliation:
     """财务报表勾稽验证器"""
@@ -138,12 +145,11 @@ class FinancialReconciliation:
             工作表字典 {工作表名: DataFrame}
         """
         try:
-            excel_file = pd.ExcelFile(file_path)
-            sheets = {}
+            # 一次读取全部工作表，避免逐个工作表重复解析整个文件
+            sheets = pd.read_excel(file_path, sheet_name=None, engine=EXCEL_ENGINE)
             
-            for sheet_name in excel_file.sheet_names:
-                df = pd.read_excel(file_path, sheet_name=sheet_name)
-                sheets[sheet_name] = df
+            for sheet_name, df in sheets.items():
+                sheets[sheet_name] = df = self._downcast_dtypes(df)
                 logger.info(f"成功加载工作表: {sheet_name}, 形状: {df.shape}")
             
             return sheets
@@ -152,6 +158,25 @@ class FinancialReconciliation:
             logger.error(f"加载Excel文件失败: {str(e)}")
             raise
     
+    def _downcast_dtypes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        压缩工作表的列类型以减少内存占用
+        
+        整数列降为最小可容纳的整数类型，重复值较多的文本列转为category；
+        金额列保持float64，避免float32精度不足导致勾稽差异。
+        """
+        if df.empty:
+            return df
+        
+        for col in df.select_dtypes(include='integer').columns:
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+        
+        for col in df.select_dtypes(include='object').columns:
+            if df[col].nunique() < len(df) * CATEGORY_MAX_UNIQUE_RATIO:
+                df[col] = df[col].astype('category')
+        
+        return df
+    
     def extract_financial_data(self, sheets: Dict[str, pd.DataFrame]) -> Dict[str, float]:
         """
         从工作表中提取关键财务数据
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+数据验证模块测试：附注项目匹配
+"""
+
+import pytest
+
+from annual_report_ai.data_validator import ReconciliationRules, _canonical_item
+
+
+@pytest.mark.parametrize('main_item, note_item', [
+    ('资产总计', '资 产\n合计'),
+    ('资产总计', '资产\u3000合计'),
+    ('银行存款', '其中：银行存款'),
+    ('应收账款', '应收账款（附注七）'),
+    ('A股投资', 'Ａ股 投资'),
+])
+def test_find_matching_items_ignores_whitespace_and_width(main_item, note_item):
+    """PDF 提取的空白、全角字符不影响匹配"""
+    note_items = ['无关项目', note_item]
+
+    assert ReconciliationRules.find_matching_items(main_item, note_items) == [note_item]
+    index = ReconciliationRules.index_note_items(note_items)
+    assert ReconciliationRules.find_matching_items(main_item, note_items, index) == [note_item]
+
+
+@pytest.mark.parametrize('main_item, note_item', [
+    ('1,234', '123'),
+    ('1 234', '123'),
+    ('(1,234.50)', '1234.5'),
+    ('１２３４', '123'),
+])
+def test_find_matching_items_does_not_match_amount_cells(main_item, note_item):
+    """金额单元格不做规范化，不会与其他数值误匹配"""
+    assert ReconciliationRules.find_matching_items(main_item, [note_item]) == []
+
+
+def test_canonical_item_keeps_punctuation():
+    """规范化只去除空白并统一全角/半角，保留标点"""
+    assert _canonical_item('资 产：合计') == '资产:合计'
+    assert _canonical_item('（一）股票投资') == '(一)股票投资'
+    assert _canonical_item('1,234') == '1,234'
+    assert _canonical_item('  ') == '  '
@@ -6,6 +6,7 @@
 
 import re
 import jieba
+import numpy as np
 from typing import Dict, List, Tuple, Optional
 import logging
 
@@ -410,24 +411,32 @@ class TextComparator:
     
     @staticmethod
     def _levenshtein_distance(s1: str, s2: str) -> int:
-        """计算编辑距离"""
+        """计算编辑距离（按行向量化的动态规划）"""
         if len(s1) < len(s2):
             return TextComparator._levenshtein_distance(s2, s1)
         
         if len(s2) == 0:
             return len(s1)
         
-        previous_row = range(len(s2) + 1)
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
-        
-        return previous_row[-1]
+        # 转为码点数组，整行比较代替逐字符循环
+        a = np.frombuffer(s1.encode('utf-32-le'), dtype=np.uint32)
+        b = np.frombuffer(s2.encode('utf-32-le'), dtype=np.uint32)
+        
+        index = np.arange(len(b) + 1)
+        previous_row = index.copy()
+        current_row = np.empty_like(previous_row)
+        for i, c1 in enumerate(a):
+            # 先取替换和删除的较小值，插入操作通过累积最小值一次完成：
+            # current[j] = min_{k<=j}(t[k] + j - k)
+            current_row[0] = i + 1
+            np.minimum(previous_row[1:] + 1, previous_row[:-1] + (b != c1),
+                       out=current_row[1:])
+            current_row -= index
+            np.minimum.accumulate(current_row, out=current_row)
+            current_row += index
+            previous_row, current_row = current_row, previous_row
+        
+        return int(previous_row[-1])
     
     @staticmethod
     def _calculate_structure_similarity(text1: str, text2: str) -> float: